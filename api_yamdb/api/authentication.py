@@ -0,0 +1,127 @@
+"""JWT-аутентификация без обращения к базе на каждый запрос.
+
+Проверенные токены и поля пользователей хранятся в ограниченных LRU
+процесса. Пользователь собирается из полей как экземпляр User
+с отложенными полями: недостающие значения загружаются из базы только
+при обращении к ним. Актуальность полей сверяется с поколением
+пользователя в кеше Django, которое меняется сигналами при каждом
+сохранении: с общим кешем (Redis, Memcached) смена роли действует со
+следующего запроса во всех процессах. Кроме того, поля из LRU и из
+токена доверяются не дольше JWT_AUTH_CACHE_TTL секунд — это ограничивает
+устаревание при кеше в памяти процесса и при изменениях через update(),
+которые не отправляют сигналы.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.cache import NANOSECONDS, peek_generation, user_generation_key
+from reviews.models import User
+
+USER_CLAIMS = ('username', 'role', 'is_superuser')
+
+
+def get_access_token(user):
+    """Токен доступа с полями, достаточными для проверки прав."""
+    token = AccessToken.for_user(user)
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    timer = time.time
+    tokens = LRUCache(settings.JWT_AUTH_CACHE_SIZE)
+    users = LRUCache(settings.JWT_AUTH_CACHE_SIZE)
+    user_fields = tuple(
+        field.attname for field in User._meta.concrete_fields
+        if field.attname != 'password'
+    )
+
+    def get_validated_token(self, raw_token):
+        token = self.tokens.get(raw_token)
+        if token is None or token['exp'] <= time.time():
+            token = super().get_validated_token(raw_token)
+            self.tokens.set(raw_token, token)
+        return token
+
+    def get_user_fields(self, validated_token, user_id):
+        now = self.timer()
+        # Отсутствие поколения — пользователь не менялся с его истечения
+        # или с запуска процесса: давность полей ограничивает TTL.
+        generation = peek_generation(user_generation_key(user_id))
+        cached = self.users.get(user_id)
+        if (
+            cached is not None and cached[0] == generation
+            and cached[2] > now
+        ):
+            return cached[1]
+        issued_at = validated_token.get('iat', 0)
+        if (
+            all(claim in validated_token for claim in USER_CLAIMS)
+            and (generation is None or issued_at * NANOSECONDS > generation)
+            and issued_at + settings.JWT_AUTH_CACHE_TTL > now
+        ):
+            fields = {'id': user_id, 'is_active': True}
+            fields.update(
+                (claim, validated_token[claim]) for claim in USER_CLAIMS)
+            expires_at = issued_at + settings.JWT_AUTH_CACHE_TTL
+        else:
+            fields = User.objects.filter(pk=user_id).values(
+                *self.user_fields).first()
+            if fields is None:
+                raise AuthenticationFailed(
+                    'Пользователь не найден', code='user_not_found')
+            expires_at = now + settings.JWT_AUTH_CACHE_TTL
+        self.users.set(user_id, (generation, fields, expires_at))
+        return fields
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит идентификатор пользователя')
+        fields = self.get_user_fields(validated_token, user_id)
+        if not fields['is_active']:
+            raise AuthenticationFailed(
+                'Пользователь неактивен', code='user_inactive')
+        names = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in fields
+        ]
+        return User.from_db(
+            User.objects.db, names, [fields[name] for name in names])
@@ -0,0 +1,141 @@
+"""Битовые индексы произведений в памяти процесса.
+
+Для каждого жанра, категории и года хранится целое число, в котором
+бит с номером id произведения установлен, если произведение подходит.
+Фильтры по жанрам, категории и годам сводятся к побитовым AND/OR,
+а в базу уходит только выборка страницы по первичному ключу.
+
+Индекс строится при первом обращении и поддерживается сигналами
+моделей. Изменения, сделанные другими процессами, он не видит, поэтому
+включается настройкой TITLE_BITMAP_INDEX только при одном процессе
+записи или вместе с периодическим reset().
+"""
+import threading
+
+from django.conf import settings
+
+from reviews.models import GenreTitle, Title
+
+
+def iter_bits(bitmap):
+    bits = bin(bitmap)[:1:-1]
+    position = bits.find('1')
+    while position != -1:
+        yield position
+        position = bits.find('1', position + 1)
+
+
+class TitleBitmapIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._all = 0
+        self._genres = {}
+        self._categories = {}
+        self._years = {}
+        self._titles = {}
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'TITLE_BITMAP_INDEX', False)
+
+    @property
+    def built(self):
+        return self._built
+
+    def reset(self):
+        with self._lock:
+            self._built = False
+            self._all = 0
+            self._genres = {}
+            self._categories = {}
+            self._years = {}
+            self._titles = {}
+
+    def build(self):
+        with self._lock:
+            self.reset()
+            self._load(Title.objects.all(), GenreTitle.objects.all())
+            self._built = True
+
+    def _load(self, titles, genre_titles):
+        genres = {}
+        for title_id, slug in genre_titles.values_list(
+            'title_id', 'genre__slug'
+        ):
+            genres.setdefault(title_id, set()).add(slug)
+        for title_id, year, category in titles.values_list(
+            'pk', 'year', 'category__slug'
+        ):
+            self._add(title_id, year, category, genres.get(title_id, ()))
+
+    def _add(self, title_id, year, category, genres):
+        bit = 1 << title_id
+        self._all |= bit
+        self._years[year] = self._years.get(year, 0) | bit
+        if category is not None:
+            self._categories[category] = (
+                self._categories.get(category, 0) | bit)
+        for slug in genres:
+            self._genres[slug] = self._genres.get(slug, 0) | bit
+        self._titles[title_id] = (year, category, frozenset(genres))
+
+    def _discard(self, title_id):
+        if title_id not in self._titles:
+            return
+        year, category, genres = self._titles.pop(title_id)
+        mask = ~(1 << title_id)
+        self._all &= mask
+        self._years[year] &= mask
+        if category is not None:
+            self._categories[category] &= mask
+        for slug in genres:
+            self._genres[slug] &= mask
+
+    def refresh(self, title_ids):
+        """Перечитывает из базы строки индекса для указанных произведений."""
+        title_ids = set(title_ids)
+        with self._lock:
+            if not self._built or not title_ids:
+                return
+            for title_id in title_ids:
+                self._discard(title_id)
+            self._load(
+                Title.objects.filter(pk__in=title_ids),
+                GenreTitle.objects.filter(title__in=title_ids),
+            )
+
+    def remove(self, title_id):
+        with self._lock:
+            self._discard(title_id)
+
+    def match(self, genres=(), all_genres=False, category=None,
+              year_min=None, year_max=None):
+        with self._lock:
+            if not self._built:
+                self.build()
+            bitmap = self._all
+            if genres:
+                bitmaps = [self._genres.get(slug, 0) for slug in genres]
+                combined = bitmaps[0]
+                for genre_bitmap in bitmaps[1:]:
+                    if all_genres:
+                        combined &= genre_bitmap
+                    else:
+                        combined |= genre_bitmap
+                bitmap &= combined
+            if category is not None:
+                bitmap &= self._categories.get(category, 0)
+            if year_min is not None or year_max is not None:
+                years = 0
+                for year, year_bitmap in self._years.items():
+                    if year_min is not None and year < year_min:
+                        continue
+                    if year_max is not None and year > year_max:
+                        continue
+                    years |= year_bitmap
+                bitmap &= years
+            return bitmap
+
+
+title_bitmaps = TitleBitmapIndex()
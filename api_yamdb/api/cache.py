@@ -0,0 +1,158 @@
+"""HTTP-кеширование ответов API по счётчикам поколений ресурсов.
+
+Поколение ресурса хранится в кеше Django и меняется сигналами моделей
+при каждой записи. Ключи кеша страниц и ETag строятся из поколений,
+поэтому устаревшие записи перестают читаться без перебора ключей,
+а условный GET отвечает 304 до обращения к базе и сериализации.
+
+Поколения живут CACHE_GENERATION_TIMEOUT секунд: с кешем в памяти
+процесса запись в одном процессе не видна другим, и истечение
+поколения ограничивает время, когда они отдают устаревшие ответы.
+С общим кешем (Redis, Memcached) запись видна всем процессам сразу.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+TITLES_GENERATION_KEY = 'titles:generation'
+CATEGORIES_GENERATION_KEY = 'categories:generation'
+GENRES_GENERATION_KEY = 'genres:generation'
+USERS_GENERATION_KEY = 'users:generation'
+NANOSECONDS = 10 ** 9
+
+
+def reviews_generation_key(title_id):
+    return f'reviews:{title_id}:generation'
+
+
+def comments_generation_key(review_id):
+    return f'comments:{review_id}:generation'
+
+
+def user_generation_key(user_id):
+    return f'user:{user_id}:generation'
+
+
+def get_generation(key):
+    # Поколение — время последнего изменения в наносекундах: когда
+    # счётчик истечёт или будет вытеснен, новое значение не совпадёт
+    # со старыми ключами.
+    generation = cache.get(key)
+    if generation is None:
+        generation = time.time_ns()
+        cache.add(key, generation, timeout=settings.CACHE_GENERATION_TIMEOUT)
+        generation = cache.get(key, generation)
+    return generation
+
+
+def peek_generation(key):
+    """Поколение без создания: None, если записей не было или оно истекло."""
+    return cache.get(key)
+
+
+def bump_generation(key):
+    cache.set(
+        key, max(time.time_ns(), (cache.get(key) or 0) + 1),
+        timeout=settings.CACHE_GENERATION_TIMEOUT,
+    )
+
+
+def get_normalized_query(request):
+    return urlencode(sorted(
+        (param, value)
+        for param, values in request.query_params.lists()
+        for value in values
+    ))
+
+
+def make_list_cache_key(request, generation_key):
+    digest = hashlib.md5(
+        f'{request.get_host()}?{get_normalized_query(request)}'.encode()
+    ).hexdigest()
+    return f'{generation_key}:{get_generation(generation_key)}:{digest}'
+
+
+class CachedListMixin:
+    """Кеширует данные ответа list по нормализованной строке запроса."""
+    list_cache_generation_key = None
+
+    def list(self, request, *args, **kwargs):
+        key = make_list_cache_key(request, self.list_cache_generation_key)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.LIST_CACHE_TIMEOUT)
+        return response
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для list/retrieve по поколениям ресурса.
+
+    Совпавший If-None-Match или If-Modified-Since возвращает 304 сразу
+    после аутентификации, без запросов к базе и сериализации.
+    """
+    version_keys = ()
+    conditional_actions = ('list', 'retrieve')
+    conditional_validators = None
+
+    def get_version_keys(self):
+        return self.version_keys
+
+    def get_validators(self, request):
+        versions = [get_generation(key) for key in self.get_version_keys()]
+        digest = hashlib.md5('|'.join(map(str, [
+            request.path,
+            get_normalized_query(request),
+            request.accepted_media_type,
+            *versions,
+        ])).encode()).hexdigest()
+        return quote_etag(digest), max(versions) // NANOSECONDS
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action not in self.conditional_actions:
+            return
+        self.conditional_validators = self.get_validators(request)
+        response = get_conditional_response(
+            request._request, *self.conditional_validators)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if self.conditional_validators is None or response.status_code not in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            return response
+        etag, last_modified = self.conditional_validators
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response, public=True,
+                max_age=settings.PUBLIC_CACHE_MAX_AGE)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
@@ -0,0 +1,38 @@
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class SlugManyRelatedField(serializers.ManyRelatedField):
+    """Список слагов, разрешаемый одним запросом ``slug__in``."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        relation = self.child_relation
+        slugs = [str(slug) for slug in data]
+        objects = relation.get_queryset().in_bulk(
+            slugs, field_name=relation.slug_field)
+        missing = [
+            slug for slug in dict.fromkeys(slugs) if slug not in objects
+        ]
+        if missing:
+            raise serializers.ValidationError([
+                relation.error_messages['does_not_exist'].format(
+                    slug_name=relation.slug_field, value=slug)
+                for slug in missing
+            ])
+        return [objects[slug] for slug in slugs]
+
+
+class BatchSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который при many=True читает все слаги сразу."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return SlugManyRelatedField(**list_kwargs)
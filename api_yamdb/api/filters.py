@@ -1,13 +1,148 @@
+from django.db.models import Count, F
 from django_filters.rest_framework import FilterSet, filters
 
-from reviews.models import Title
+from api.bitmaps import iter_bits, title_bitmaps
+from reviews.constants import TITLE_BITMAP_MAX_IDS, YEAR_FACET_BUCKET
+from reviews.models import Category, GenreTitle, Title, User
+from reviews.search import find_similar_users, search_titles, search_users
 
 
 class TitleFilter(FilterSet):
-    genre = filters.CharFilter(field_name='genre__slug')
-    category = filters.CharFilter(field_name='category__slug')
+    """Фильтры произведений.
+
+    Жанры и категория проверяются подзапросами IN по индексам
+    (genre_id, title_id) и (category_id, year), а не JOIN, поэтому
+    строки не дублируются и DISTINCT не нужен.
+
+    При включённом TITLE_BITMAP_INDEX жанры, категория и годы
+    проверяются битовым индексом в памяти, а в базу передаётся
+    список id; слишком широкие выборки остаются на SQL.
+    """
+    GENRE_MATCH_ANY = 'any'
+    GENRE_MATCH_ALL = 'all'
+    BITMAP_FIELDS = (
+        'genre', 'genre_match', 'category', 'year', 'year_min', 'year_max',
+    )
+
+    genre = filters.CharFilter(method='filter_genre')
+    genre_match = filters.ChoiceFilter(
+        choices=((GENRE_MATCH_ANY, 'Любой'), (GENRE_MATCH_ALL, 'Все')),
+        method='filter_noop'
+    )
+    category = filters.CharFilter(method='filter_category')
     name = filters.CharFilter(field_name='name')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    rating_min = filters.NumberFilter(method='filter_rating_min')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('genre', 'category', 'name', 'year')
+        fields = (
+            'genre', 'genre_match', 'category', 'name', 'year', 'year_min',
+            'year_max', 'rating_min', 'search',
+        )
+
+    def filter_queryset(self, queryset):
+        data = self.form.cleaned_data
+        if not title_bitmaps.enabled or all(
+            data.get(name) in (None, '') for name in self.BITMAP_FIELDS
+            if name != 'genre_match'
+        ):
+            return super().filter_queryset(queryset)
+        bitmap = self.match_bitmap(data)
+        if bitmap.bit_count() > TITLE_BITMAP_MAX_IDS:
+            return super().filter_queryset(queryset)
+        queryset = queryset.filter(pk__in=list(iter_bits(bitmap)))
+        for name, value in data.items():
+            if name not in self.BITMAP_FIELDS:
+                queryset = self.filters[name].filter(queryset, value)
+        return queryset
+
+    def match_bitmap(self, data):
+        year_min, year_max = data.get('year_min'), data.get('year_max')
+        year = data.get('year')
+        if year is not None:
+            year_min = year if year_min is None else max(year_min, year)
+            year_max = year if year_max is None else min(year_max, year)
+        return title_bitmaps.match(
+            genres=set(filter(None, (data.get('genre') or '').split(','))),
+            all_genres=data.get('genre_match') == self.GENRE_MATCH_ALL,
+            category=data.get('category') or None,
+            year_min=year_min,
+            year_max=year_max,
+        )
+
+    def filter_noop(self, queryset, name, value):
+        return queryset
+
+    def filter_genre(self, queryset, name, value):
+        slugs = set(filter(None, value.split(',')))
+        genre_titles = GenreTitle.objects.filter(
+            genre__slug__in=slugs).values('title')
+        if self.form.cleaned_data.get('genre_match') == self.GENRE_MATCH_ALL:
+            genre_titles = genre_titles.annotate(
+                genres=Count('genre')
+            ).filter(genres=len(slugs)).values('title')
+        return queryset.filter(pk__in=genre_titles)
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(
+            category__in=Category.objects.filter(slug=value).values('pk')
+        )
+
+    def filter_rating_min(self, queryset, name, value):
+        return queryset.filter(
+            review_count__gt=0,
+            score_sum__gte=F('review_count') * value,
+        )
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class UserFilter(FilterSet):
+    """Поиск пользователей.
+
+    search — начало username без учёта регистра, выбирается диапазоном
+    по индексу LOWER(username); similar — нечёткий поиск по триграммам.
+    """
+    search = filters.CharFilter(method='filter_search')
+    similar = filters.CharFilter(method='filter_similar')
+
+    class Meta:
+        model = User
+        fields = ('search', 'similar')
+
+    def filter_search(self, queryset, name, value):
+        return search_users(queryset, value)
+
+    def filter_similar(self, queryset, name, value):
+        return find_similar_users(queryset, value)
+
+
+def count_title_facets(queryset, facets):
+    """Считает произведения выборки по жанрам, категориям и десятилетиям.
+
+    На каждый фасет приходится один запрос с GROUP BY.
+    """
+    queryset = queryset.select_related(None).prefetch_related(
+        None).order_by()
+    groups = {}
+    if 'genre' in facets:
+        groups['genre'] = queryset.filter(genre__isnull=False).values_list(
+            'genre__slug').annotate(count=Count('pk'))
+    if 'category' in facets:
+        groups['category'] = queryset.values_list(
+            'category__slug').annotate(count=Count('pk'))
+    if 'year' in facets:
+        groups['year'] = queryset.annotate(
+            decade=F('year') / YEAR_FACET_BUCKET * YEAR_FACET_BUCKET
+        ).values_list('decade').annotate(count=Count('pk'))
+    return {
+        facet: {
+            '' if value is None else str(value): count
+            for value, count in group.order_by()
+        }
+        for facet, group in groups.items()
+    }
@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from api.bitmaps import title_bitmaps
+from api.filters import TitleFilter
+from reviews.models import Category, Genre, Title
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает фильтрацию произведений через SQL и через '
+            'битовый индекс в памяти.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def get_scenarios(self):
+        genres = list(Genre.objects.values_list('slug', flat=True)[:2])
+        category = Category.objects.values_list('slug', flat=True).first()
+        years = Title.objects.order_by('year').values_list('year', flat=True)
+        year = years[years.count() // 2] if years.exists() else 0
+        scenarios = {'category + годы': {
+            'category': category or '', 'year_min': year,
+        }}
+        if genres:
+            scenarios['жанр'] = {'genre': genres[0]}
+            scenarios['жанр + категория + год'] = {
+                'genre': genres[0], 'category': category or '',
+                'year_max': year,
+            }
+            scenarios['все жанры'] = {
+                'genre': ','.join(genres), 'genre_match': 'all',
+            }
+        return scenarios
+
+    def run_filter(self, params):
+        queryset = TitleFilter(
+            params, queryset=Title.objects.order_by('name', 'id')).qs
+        count = queryset.count()
+        page = list(queryset.values_list(
+            'pk', flat=True)[:settings.REST_FRAMEWORK['PAGE_SIZE']])
+        return count, page
+
+    def measure(self, params, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = self.run_filter(params)
+        return (time.perf_counter() - started) / repeat * 1000, result
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        started = time.perf_counter()
+        title_bitmaps.build()
+        self.stdout.write(
+            f'Индекс построен за '
+            f'{(time.perf_counter() - started) * 1000:.1f} мс')
+        for name, params in self.get_scenarios().items():
+            with override_settings(TITLE_BITMAP_INDEX=False):
+                sql_time, sql_result = self.measure(params, repeat)
+            with override_settings(TITLE_BITMAP_INDEX=True):
+                bitmap_time, bitmap_result = self.measure(params, repeat)
+            if sql_result != bitmap_result:
+                self.stderr.write(self.style.ERROR(
+                    f'{name}: результаты SQL и индекса расходятся'))
+            self.stdout.write(
+                f'{name}: найдено {sql_result[0]}, SQL {sql_time:.2f} мс, '
+                f'индекс {bitmap_time:.2f} мс')
@@ -0,0 +1,35 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.outbox import deliver_batches
+
+
+class Command(BaseCommand):
+    help = 'Доставляет письма из очереди OutboxEmail.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь один раз и завершиться.')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза в секундах, когда в очереди нет писем.')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            '--workers', type=int, default=settings.EMAIL_SEND_WORKERS)
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            while True:
+                delivered = deliver_batches(
+                    executor, options['batch_size'], options['workers'])
+                if delivered:
+                    self.stdout.write(f'Обработано писем: {delivered}')
+                    continue
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
@@ -0,0 +1,189 @@
+"""Транзакционная очередь писем.
+
+Письмо записывается в OutboxEmail в той же транзакции, что и данные,
+из-за которых оно отправляется: откат транзакции отменяет и письмо.
+После коммита письмо сразу пробуют отправить в фоне, а всё, что не
+ушло, доставляет команда run_outbox_worker с повторами и нарастающими
+паузами. Письма захватываются условным UPDATE, поэтому одно письмо
+не отправляют два обработчика одновременно.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reviews.models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Приостанавливает отправку, пока почтовый бэкенд отказывает."""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return (
+                self.opened_at is not None
+                and time.monotonic() - self.opened_at < self.reset_timeout
+            )
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def reset(self):
+        self.record_success()
+
+
+circuit_breaker = CircuitBreaker(
+    settings.OUTBOX_CIRCUIT_FAILURES, settings.OUTBOX_CIRCUIT_RESET)
+
+mail_executor = ThreadPoolExecutor(
+    max_workers=settings.EMAIL_SEND_WORKERS,
+    thread_name_prefix='mail',
+)
+
+
+def queue_email(subject, body, recipients):
+    email = OutboxEmail.objects.create(
+        subject=subject, body=body, recipients=list(recipients))
+    transaction.on_commit(lambda: deliver_soon([email.pk]))
+    return email
+
+
+def deliver_soon(email_ids):
+    if not settings.EMAIL_SEND_ASYNC:
+        deliver_pending(email_ids)
+        return
+    mail_executor.submit(deliver_in_background, email_ids)
+
+
+def deliver_in_background(email_ids):
+    try:
+        deliver_pending(email_ids)
+    except Exception:
+        logger.exception('Не удалось отправить письма %s', email_ids)
+    finally:
+        connection.close()
+
+
+def claim(email_ids=None, limit=None):
+    """Захватывает письма, которым пора уходить, и возвращает их."""
+    now = timezone.now()
+    if email_ids is not None:
+        candidates = email_ids
+    else:
+        candidates = list(OutboxEmail.objects.due(now).order_by(
+            'next_attempt_at'
+        ).values_list('pk', flat=True)[:limit or settings.OUTBOX_BATCH_SIZE])
+    if not candidates:
+        return []
+    token = uuid.uuid4()
+    OutboxEmail.objects.due(now).filter(pk__in=candidates).update(
+        claimed_by=token,
+        next_attempt_at=now + timedelta(
+            seconds=settings.OUTBOX_CLAIM_TIMEOUT),
+    )
+    return list(OutboxEmail.objects.filter(claimed_by=token))
+
+
+def send_batch(emails):
+    """Отправляет письма через одно соединение, возвращает ошибки по id."""
+    backend = get_connection()
+    try:
+        backend.open()
+    except Exception as error:
+        return {email.pk: repr(error) for email in emails}
+    errors = {}
+    try:
+        for email in emails:
+            try:
+                EmailMessage(
+                    email.subject, email.body, settings.EMAIL_FROM_ADDRESS,
+                    email.recipients, connection=backend,
+                ).send()
+            except Exception as error:
+                errors[email.pk] = repr(error)
+    finally:
+        backend.close()
+    return errors
+
+
+def get_retry_delay(attempts):
+    return timedelta(seconds=min(
+        settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.OUTBOX_RETRY_MAX_DELAY,
+    ))
+
+
+def record_results(emails, errors):
+    now = timezone.now()
+    OutboxEmail.objects.filter(
+        pk__in=[email.pk for email in emails if email.pk not in errors]
+    ).update(sent_at=now, claimed_by=None)
+    failed = [email for email in emails if email.pk in errors]
+    for email in failed:
+        email.attempts += 1
+        email.last_error = errors[email.pk]
+        email.claimed_by = None
+        if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            email.failed_at = now
+        else:
+            email.next_attempt_at = now + get_retry_delay(email.attempts)
+    OutboxEmail.objects.bulk_update(failed, (
+        'attempts', 'last_error', 'claimed_by', 'failed_at',
+        'next_attempt_at',
+    ))
+    if len(failed) < len(emails):
+        circuit_breaker.record_success()
+    elif failed:
+        circuit_breaker.record_failure()
+
+
+def deliver_pending(email_ids=None):
+    if circuit_breaker.is_open:
+        return 0
+    emails = claim(email_ids)
+    if emails:
+        record_results(emails, send_batch(emails))
+    return len(emails)
+
+
+def deliver_batches(executor, batch_size, batches):
+    """Отправляет до batches пачек параллельно, пишет итоги в базу.
+
+    Потоки только общаются с почтовым сервером, а захват и запись
+    результатов идут в вызывающем потоке.
+    """
+    if circuit_breaker.is_open:
+        return 0
+    emails = claim(limit=batch_size * batches)
+    chunks = [
+        emails[start:start + batch_size]
+        for start in range(0, len(emails), batch_size)
+    ]
+    for chunk, errors in zip(chunks, executor.map(send_batch, chunks)):
+        record_results(chunk, errors)
+    return len(emails)
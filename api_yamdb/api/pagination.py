@@ -0,0 +1,52 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """Постраничная пагинация с курсорным режимом по запросу.
+
+    Курсорный режим включается параметром ``?pagination=cursor``.
+    Ссылки ``next``/``previous`` несут параметр ``cursor``, по которому
+    режим сохраняется при переходе по страницам.
+    """
+    cursor_ordering = None
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    cursor_paginator = None
+
+    def get_cursor_paginator(self, request):
+        if (
+            request.query_params.get(self.mode_query_param)
+            != self.cursor_mode
+            and CursorPagination.cursor_query_param
+            not in request.query_params
+        ):
+            return None
+        paginator = CursorPagination()
+        paginator.ordering = self.cursor_ordering
+        paginator.page_size = self.page_size
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = self.get_cursor_paginator(request)
+        if self.cursor_paginator is None:
+            return super().paginate_queryset(queryset, request, view)
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is None:
+            return super().get_paginated_response(data)
+        return self.cursor_paginator.get_paginated_response(data)
+
+
+class TitlePagination(OptionalCursorPagination):
+    cursor_ordering = ('name', 'id')
+
+
+class PubDatePagination(OptionalCursorPagination):
+    cursor_ordering = ('-pub_date', '-id')
+
+
+class PubDateCursorPagination(CursorPagination):
+    ordering = ('-pub_date', '-id')
@@ -1,11 +1,17 @@
 import re
+from collections import Counter
 
 from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.permissions import SAFE_METHODS
 
+from api.authentication import get_access_token
+from api.fields import BatchSlugRelatedField
 from reviews.constants import (
+    EMBED_COMMENTS_MAX,
     FORBIDDEN_USERNAME,
     MAX_CONFIRMATION_CODE,
     MAX_EMAIL_LENGTH,
@@ -13,12 +19,41 @@ from reviews.constants import (
     MAX_USERNAME_LENGTH,
     MIN_SCORE,
     SCORE_ERROR,
+    TOP_TITLES_LIMIT,
+    TOP_TITLES_MAX_LIMIT,
+    TOP_TITLES_MIN_REVIEWS,
     USERNAME_REGEX,
 )
 from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import titles_bulk_saved
 
 
-class UserSerializer(serializers.ModelSerializer):
+def get_sparse_fields(request, fields):
+    """Оставляет поля из ?fields= и убирает перечисленные в ?omit=."""
+    if request is None or request.method not in SAFE_METHODS:
+        return list(fields)
+    requested = request.query_params.get('fields')
+    omitted = request.query_params.get('omit')
+    if requested:
+        requested = set(requested.split(','))
+        fields = [field for field in fields if field in requested]
+    if omitted:
+        omitted = set(omitted.split(','))
+        fields = [field for field in fields if field not in omitted]
+    return list(fields)
+
+
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """Сериализатор, отдающий только запрошенные в GET поля."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = get_sparse_fields(self.context.get('request'), self.fields)
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+
+
+class UserSerializer(SparseFieldsetSerializer):
     class Meta:
         model = User
         fields = (
@@ -26,19 +61,19 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetSerializer):
     class Meta:
         model = Category
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsetSerializer):
     class Meta:
         model = Genre
         fields = ('name', 'slug')
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(SparseFieldsetSerializer):
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(read_only=True, default=None)
@@ -46,12 +81,45 @@ class TitleReadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Title
         fields = (
-            'id', 'name', 'year', 'description', 'genre', 'category', 'rating'
+            'id', 'name', 'year', 'description', 'genre', 'category',
+            'rating', 'review_count',
         )
 
 
+class TitleRatingHistogramSerializer(SparseFieldsetSerializer):
+    rating = serializers.FloatField(read_only=True)
+    weighted_rating = serializers.FloatField(read_only=True)
+    histogram = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = (
+            'id', 'review_count', 'rating', 'weighted_rating', 'histogram'
+        )
+
+    def get_histogram(self, title):
+        return {
+            score_count.score: score_count.review_count
+            for score_count in title.score_counts.all()
+        }
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=TOP_TITLES_MAX_LIMIT,
+        default=TOP_TITLES_LIMIT
+    )
+    min_reviews = serializers.IntegerField(
+        min_value=1,
+        default=TOP_TITLES_MIN_REVIEWS
+    )
+
+
 class TitleWriteSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
+    genre = BatchSlugRelatedField(
         many=True,
         slug_field='slug',
         queryset=Genre.objects.all(),
@@ -70,7 +138,120 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         return TitleReadSerializer(instance, context=self.context).data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """Создание и обновление пачки произведений в одной транзакции.
+
+    Слаги жанров и категорий, а также изменяемые произведения читаются
+    одним запросом на всю пачку; произведения и связи с жанрами пишутся
+    через bulk_create.
+    """
+
+    def to_internal_value(self, data):
+        genre_slugs, category_slugs = set(), set()
+        title_ids = Counter()
+        for item in data if isinstance(data, list) else ():
+            if not isinstance(item, dict):
+                continue
+            if isinstance(item.get('genre'), list):
+                genre_slugs.update(map(str, item['genre']))
+            if item.get('category') is not None:
+                category_slugs.add(str(item['category']))
+            if str(item.get('id', '')).isdigit():
+                title_ids[int(item['id'])] += 1
+        self.child.genres = Genre.objects.in_bulk(
+            genre_slugs, field_name='slug')
+        self.child.categories = Category.objects.in_bulk(
+            category_slugs, field_name='slug')
+        self.child.titles = Title.objects.in_bulk(title_ids)
+        self.child.repeated_ids = {
+            title_id for title_id, count in title_ids.items() if count > 1
+        }
+        return super().to_internal_value(data)
+
+    def save(self, **kwargs):
+        titles, genre_ids = [], []
+        updated_fields = set()
+        for item in self.validated_data:
+            title = item.get('title') or Title()
+            # Поля, которых нет в элементе, у существующих произведений
+            # остаются прежними.
+            fields = [
+                field for field in ('name', 'year', 'description', 'category')
+                if field in item
+            ]
+            for field in fields:
+                setattr(title, field, item[field])
+            if title.pk is not None:
+                updated_fields.update(fields)
+            titles.append(title)
+            genre_ids.append([genre.pk for genre in item['genre']])
+        created = [title for title in titles if title.pk is None]
+        updated = [title for title in titles if title.pk is not None]
+        through = Title.genre.through
+        with transaction.atomic():
+            Title.objects.bulk_create(created)
+            if updated_fields:
+                Title.objects.bulk_update(updated, sorted(updated_fields))
+            through.objects.filter(
+                title_id__in=[title.pk for title in updated]).delete()
+            through.objects.bulk_create([
+                through(title_id=title.pk, genre_id=genre_id)
+                for title, title_genre_ids in zip(titles, genre_ids)
+                for genre_id in title_genre_ids
+            ])
+            titles_bulk_saved.send(
+                sender=Title, titles=titles, using=Title.objects.db)
+        self.instance = titles
+        return self.instance
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(
+        child=serializers.SlugField(),
+        allow_empty=False
+    )
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
+        list_serializer_class = TitleBulkListSerializer
+
+    def validate(self, data):
+        errors = {}
+        unknown_genres = [
+            slug for slug in data['genre'] if slug not in self.genres
+        ]
+        if unknown_genres:
+            errors['genre'] = [
+                f'Жанр «{slug}» не найден.' for slug in unknown_genres
+            ]
+        if data['category'] not in self.categories:
+            errors['category'] = [
+                f'Категория «{data["category"]}» не найдена.'
+            ]
+        if 'id' in data and data['id'] not in self.titles:
+            errors['id'] = [f'Произведение {data["id"]} не найдено.']
+        elif data.get('id') in self.repeated_ids:
+            errors['id'] = [
+                f'Произведение {data["id"]} указано в пачке несколько раз.'
+            ]
+        if errors:
+            raise serializers.ValidationError(errors)
+        data['genre'] = [
+            self.genres[slug] for slug in dict.fromkeys(data['genre'])
+        ]
+        data['category'] = self.categories[data['category']]
+        if 'id' in data:
+            data['title'] = self.titles[data.pop('id')]
+        return data
+
+    def to_representation(self, instance):
+        return {'id': instance.pk, 'name': instance.name}
+
+
+class ReviewSerializer(SparseFieldsetSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -79,7 +260,7 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'score', 'author', 'pub_date')
+        fields = ('id', 'text', 'score', 'author', 'pub_date', 'comment_count')
 
     def validate_score(self, value):
         if not (MIN_SCORE <= value <= MAX_SCORE):
@@ -88,20 +269,8 @@ class ReviewSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def validate(self, data):
-        request = self.context.get('request')
-        user = request.user
-        title = self.context.get('view').kwargs.get('title_id')
-
-        if request.method == 'POST':
-            if Review.objects.filter(title_id=title, author=user).exists():
-                raise serializers.ValidationError(
-                    {'detail': 'Вы уже оставляли отзыв на это произведение.'}
-                )
-        return data
-
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -112,6 +281,35 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'pub_date')
 
 
+class TitleShortSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Title
+        fields = ('id', 'name')
+
+
+class UserReviewSerializer(ReviewSerializer):
+    title = TitleShortSerializer(read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title',)
+
+
+class ReviewWithCommentsSerializer(ReviewSerializer):
+    comments = CommentSerializer(
+        many=True, read_only=True, source='latest_comments')
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('comments',)
+
+
+class ReviewQuerySerializer(serializers.Serializer):
+    embed_comments = serializers.IntegerField(
+        min_value=0,
+        max_value=EMBED_COMMENTS_MAX,
+        default=0
+    )
+
+
 class SignupSerializer(serializers.Serializer):
     email = serializers.EmailField(max_length=MAX_EMAIL_LENGTH)
     username = serializers.CharField(max_length=MAX_USERNAME_LENGTH)
@@ -126,24 +324,36 @@ class SignupSerializer(serializers.Serializer):
             )
         return value
 
+    existing_user = None
+
     def validate(self, data):
         username = data.get('username')
         email = data.get('email')
-        if User.objects.filter(username=username, email=email).exists():
-            return data
-        if User.objects.filter(username=username).exists():
+        # Все случаи конфликта разбираются по одному запросу.
+        users = User.objects.filter(Q(username=username) | Q(email=email))
+        for user in users:
+            if (user.username, user.email) == (username, email):
+                self.existing_user = user
+                return data
+        if any(user.username == username for user in users):
             raise serializers.ValidationError(
                 'Пользователь с таким именем уже существует.'
             )
-        if User.objects.filter(email=email).exists():
+        if users:
             raise serializers.ValidationError(
                 'Пользователь с таким email уже существует.'
             )
         return data
 
     def create(self, validated_data):
-        user, _ = User.objects.get_or_create(**validated_data)
-        return user
+        if self.existing_user is not None:
+            return self.existing_user
+        try:
+            return User.objects.create(**validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                'Пользователь с таким именем или email уже существует.'
+            )
 
 
 class TokenSerializer(serializers.Serializer):
@@ -156,4 +366,4 @@ class TokenSerializer(serializers.Serializer):
         code = data.get('confirmation_code')
         if not default_token_generator.check_token(user, code):
             raise serializers.ValidationError('Не верный код подтверждения')
-        return {'access': str(AccessToken.for_user(user))}
+        return {'access': str(get_access_token(user))}
@@ -0,0 +1,158 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from api.bitmaps import title_bitmaps
+from api.cache import (CATEGORIES_GENERATION_KEY, GENRES_GENERATION_KEY,
+                       TITLES_GENERATION_KEY, USERS_GENERATION_KEY,
+                       bump_generation, comments_generation_key,
+                       reviews_generation_key, user_generation_key)
+from api.throttling import blocked_keys
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import deleted_with, titles_bulk_saved
+
+
+def bump_on_commit(*keys):
+    """Меняет поколения после фиксации записи.
+
+    Иначе запрос, пришедший до фиксации, закешировал бы старые данные
+    под новым поколением.
+    """
+    def bump():
+        for key in keys:
+            bump_generation(key)
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(titles_bulk_saved, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_titles_cache(sender, **kwargs):
+    bump_on_commit(TITLES_GENERATION_KEY)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories_cache(sender, **kwargs):
+    bump_on_commit(CATEGORIES_GENERATION_KEY)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres_cache(sender, **kwargs):
+    bump_on_commit(GENRES_GENERATION_KEY)
+
+
+@receiver(post_delete, sender=Title)
+def invalidate_title_reviews_cache(sender, instance, **kwargs):
+    bump_on_commit(reviews_generation_key(instance.pk))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviews_cache(sender, instance, **kwargs):
+    bump_on_commit(reviews_generation_key(instance.title_id))
+
+
+@receiver(post_delete, sender=Review)
+def invalidate_review_comments_cache(sender, instance, **kwargs):
+    bump_on_commit(comments_generation_key(instance.pk))
+
+
+@receiver(pre_delete, sender=User)
+def collect_comment_titles(sender, instance, origin=None, **kwargs):
+    # Вместе с пользователем удаляются его комментарии и комментарии
+    # к его отзывам: произведения их отзывов читаются одним запросом.
+    if origin is None:
+        return
+    vars(origin).setdefault('_comment_title_ids', {}).update(
+        Comment.objects.filter(
+            Q(author=instance) | Q(review__author=instance)
+        ).values_list('review_id', 'review__title_id')
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments_cache(sender, instance, origin=None, **kwargs):
+    bump_on_commit(comments_generation_key(instance.review_id))
+    # Отзывы отдают comment_count и вложенные комментарии. При каскаде
+    # от отзыва или произведения поколение отзывов меняет их обработчик.
+    if origin is not None and deleted_with(origin, Review, Title):
+        return
+    if Comment.review.is_cached(instance):
+        title_id = instance.review.title_id
+    else:
+        title_id = getattr(origin, '_comment_title_ids', {}).get(
+            instance.review_id)
+    if title_id is None:
+        title_id = Review.objects.filter(
+            pk=instance.review_id).values_list('title_id', flat=True).first()
+    if title_id is not None:
+        bump_on_commit(reviews_generation_key(title_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_users_cache(sender, instance, **kwargs):
+    # Сбрасывает и закешированного при аутентификации пользователя.
+    bump_on_commit(USERS_GENERATION_KEY, user_generation_key(instance.pk))
+
+
+@receiver(post_save, sender=Title)
+def refresh_title_bitmaps(sender, instance, **kwargs):
+    transaction.on_commit(lambda: title_bitmaps.refresh([instance.pk]))
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_bitmaps(sender, instance, **kwargs):
+    title_id = instance.pk
+    transaction.on_commit(lambda: title_bitmaps.remove(title_id))
+
+
+@receiver(titles_bulk_saved, sender=Title)
+def refresh_bulk_saved_title_bitmaps(sender, titles, **kwargs):
+    title_ids = [title.pk for title in titles]
+    transaction.on_commit(lambda: title_bitmaps.refresh(title_ids))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def refresh_title_genre_bitmaps(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse and action == 'post_clear':
+        transaction.on_commit(title_bitmaps.reset)
+        return
+    title_ids = set(pk_set) if reverse else {instance.pk}
+    transaction.on_commit(lambda: title_bitmaps.refresh(title_ids))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_title_bitmaps(sender, **kwargs):
+    # Слаги жанров и категорий — ключи индекса, проще собрать его заново.
+    transaction.on_commit(title_bitmaps.reset)
+
+
+def invalidate_all_caches(sender, **kwargs):
+    for key in (
+        TITLES_GENERATION_KEY,
+        CATEGORIES_GENERATION_KEY,
+        GENRES_GENERATION_KEY,
+        USERS_GENERATION_KEY,
+    ):
+        bump_generation(key)
+    title_bitmaps.reset()
+    blocked_keys.clear()
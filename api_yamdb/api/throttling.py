@@ -0,0 +1,181 @@
+"""Ограничение частоты запросов скользящим окном.
+
+Счётчик хранит число запросов в текущем и предыдущем окне фиксированной
+длины; оценка нагрузки — сумма текущего окна и доли предыдущего,
+пропорциональной ещё не прошедшей части окна. Счётчики лежат в общем
+для всех процессов хранилище: по умолчанию одна строка ThrottleCounter
+на ключ, которая обновляется одним UPSERT за запрос. Строки, чьи окна
+уже не влияют на оценку, удаляются на случайной доле запросов
+(THROTTLE_PURGE_PROBABILITY).
+
+Отклонённый ключ запоминается в памяти процесса до истечения паузы,
+поэтому повторные запросы отклоняются без обращения к хранилищу.
+"""
+import random
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.authentication import LRUCache
+from reviews.models import ThrottleCounter
+
+
+class DatabaseCounterStore:
+    """Счётчики в таблице ThrottleCounter, общие для всех процессов."""
+
+    def __init__(self):
+        quote = connection.ops.quote_name
+        table = quote(ThrottleCounter._meta.db_table)
+        key, window, count, previous, expires_at = (
+            quote(ThrottleCounter._meta.get_field(name).column)
+            for name in (
+                'key', 'window_start', 'count', 'previous_count',
+                'expires_at',
+            )
+        )
+        self.sql = (
+            f'INSERT INTO {table} '
+            f'({key}, {window}, {count}, {previous}, {expires_at}) '
+            f'VALUES (%s, %s, 1, 0, %s) '
+            f'ON CONFLICT ({key}) DO UPDATE SET '
+            f'{previous} = CASE '
+            f'WHEN {table}.{window} = excluded.{window} '
+            f'THEN {table}.{previous} '
+            f'WHEN {table}.{window} = excluded.{window} - 1 '
+            f'THEN {table}.{count} ELSE 0 END, '
+            f'{count} = CASE WHEN {table}.{window} = excluded.{window} '
+            f'THEN {table}.{count} + 1 ELSE 1 END, '
+            f'{window} = excluded.{window}, '
+            f'{expires_at} = excluded.{expires_at} '
+            f'RETURNING {count}, {previous}'
+        )
+
+    def hit(self, key, window, duration):
+        """Учитывает запрос, возвращает счётчики текущего и прошлого окна."""
+        if random.random() < settings.THROTTLE_PURGE_PROBABILITY:
+            self.purge(window * duration)
+        # Через два окна ни текущий, ни прошлый счётчик уже не нужны.
+        expires_at = (window + 2) * duration
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql, (key, window, expires_at))
+            return cursor.fetchone()
+
+    def purge(self, now):
+        """Удаляет счётчики ключей, не обращавшихся два окна подряд."""
+        return ThrottleCounter.objects.filter(expires_at__lte=now).delete()
+
+    def clear(self):
+        ThrottleCounter.objects.all().delete()
+
+
+class CacheCounterStore:
+    """Счётчики в кеше Django с атомарным incr (Redis, Memcached).
+
+    Для счётчиков лучше выделить отдельный кеш THROTTLE_CACHE_ALIAS:
+    clear() очищает его целиком.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def hit(self, key, window, duration):
+        current_key = f'throttle:{key}:{window}'
+        self.cache.add(current_key, 0, timeout=duration * 2)
+        count = self.cache.incr(current_key)
+        return count, self.cache.get(f'throttle:{key}:{window - 1}', 0)
+
+    def clear(self):
+        self.cache.clear()
+
+
+@lru_cache
+def load_counter_store(path):
+    return import_string(path)()
+
+
+def get_counter_store():
+    return load_counter_store(settings.THROTTLE_STORE)
+
+
+blocked_keys = LRUCache(settings.THROTTLE_BLOCKED_CACHE_SIZE)
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    cache_format = '%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        # Частоты читаются при каждом запросе, а не при импорте класса.
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        now = self.timer()
+        blocked_until = blocked_keys.get(self.key)
+        if blocked_until is not None and blocked_until > now:
+            self.retry_after = blocked_until - now
+            return False
+        window, offset = divmod(now, self.duration)
+        count, previous = get_counter_store().hit(
+            self.key, int(window), self.duration)
+        if previous * (1 - offset / self.duration) + count <= (
+            self.num_requests
+        ):
+            return True
+        self.retry_after = self.get_retry_after(count, previous, offset)
+        blocked_keys.set(self.key, now + self.retry_after)
+        return False
+
+    def get_retry_after(self, count, previous, offset):
+        """Время до момента, когда следующий запрос уложится в лимит."""
+        spare = self.num_requests - count - 1
+        if spare >= 0 and previous:
+            # Хватит текущего окна: ждём, пока остынет предыдущее.
+            fraction = 1 - spare / previous
+            return fraction * self.duration - offset
+        fraction = 1 - (self.num_requests - 1) / count
+        return self.duration - offset + fraction * self.duration
+
+    def wait(self):
+        return self.retry_after
+
+    def format_key(self, ident):
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class AuthRateThrottle(SlidingWindowThrottle):
+    """Запросы к регистрации и получению токена с одного IP."""
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        return self.format_key(self.get_ident(request))
+
+
+class AuthUsernameRateThrottle(SlidingWindowThrottle):
+    """Попытки регистрации и подбора кода для одного username."""
+    scope = 'auth_username'
+
+    def get_cache_key(self, request, view):
+        data = request.data
+        username = data.get('username') if hasattr(data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        return self.format_key(username)
+
+
+class WriteRateThrottle(SlidingWindowThrottle):
+    """Создание отзывов и комментариев одним пользователем."""
+    scope = 'writes'
+
+    def get_cache_key(self, request, view):
+        if request.method != 'POST' or not request.user.is_authenticated:
+            return None
+        return self.format_key(request.user.pk)
@@ -1,6 +1,6 @@
-from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+
+from api.outbox import queue_email
 
 
 def get_confirmation_code(user):
@@ -8,11 +8,9 @@ def get_confirmation_code(user):
 
 
 def send_confirmation_code(user):
-    user.confirmation_code = get_confirmation_code(user)
-    user.save()
-    send_mail(
+    # Код выводится из состояния пользователя и не хранится в базе.
+    queue_email(
         'Данные для получения токена',
-        f'Код подтверждения {user.confirmation_code}',
-        settings.EMAIL_FROM_ADDRESS,
+        f'Код подтверждения {get_confirmation_code(user)}',
         [user.email],
     )
@@ -1,46 +1,78 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly,
                                         SAFE_METHODS)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from api.filters import TitleFilter
+from api.cache import (CATEGORIES_GENERATION_KEY, GENRES_GENERATION_KEY,
+                       TITLES_GENERATION_KEY, USERS_GENERATION_KEY,
+                       CachedListMixin, ConditionalGetMixin,
+                       comments_generation_key, reviews_generation_key)
+from api.filters import TitleFilter, UserFilter, count_title_facets
+from api.pagination import (PubDateCursorPagination, PubDatePagination,
+                            TitlePagination)
 from api.permissions import (IsAdmin, IsAdminOrReadOnly,
                              IsAuthorOrAdminOrModerator)
 from api.serializers import (
     CategorySerializer,
     CommentSerializer,
     GenreSerializer,
+    ReviewQuerySerializer,
     ReviewSerializer,
+    ReviewWithCommentsSerializer,
+    TitleBulkSerializer,
+    TitleRatingHistogramSerializer,
     TitleReadSerializer,
     TitleWriteSerializer,
+    TopTitlesQuerySerializer,
+    UserReviewSerializer,
     UserSerializer,
     SignupSerializer,
     TokenSerializer,
+    get_sparse_fields,
 )
+from api.throttling import (AuthRateThrottle, AuthUsernameRateThrottle,
+                            WriteRateThrottle)
 from api.utils import send_confirmation_code
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.constants import DUPLICATE_REVIEW_ERROR, TITLES_BULK_MAX_SIZE
+from reviews.models import (Category, Comment, Genre, Review, Title, TitleRank,
+                            User)
 
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     lookup_field = 'username'
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = UserFilter
     permission_classes = (IsAdmin,)
-    search_fields = ('username',)
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    def get_object(self):
+        user = self.filter_queryset(self.get_queryset()).by_username(
+            self.kwargs[self.lookup_field]).first()
+        if user is None:
+            raise Http404
+        self.check_object_permissions(self.request, user)
+        return user
+
     @action(detail=False, methods=['get', 'patch'],
             permission_classes=(IsAuthenticated,),
             url_path='me')
     def me(self, request):
+        # Пользователь из токена может быть загружен не полностью.
+        deferred = request.user.get_deferred_fields()
+        if deferred:
+            request.user.refresh_from_db(fields=deferred)
         if request.method == 'GET':
             serializer = self.get_serializer(request.user)
             return Response(serializer.data)
@@ -50,8 +82,28 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.save(role=request.user.role)
         return Response(serializer.data)
 
+    def list_reviews(self, author):
+        page = self.paginate_queryset(
+            author.reviews.select_related('title', 'author'))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, permission_classes=(IsAuthenticated,),
+            url_path='me/reviews', serializer_class=UserReviewSerializer,
+            pagination_class=PubDateCursorPagination)
+    def my_reviews(self, request):
+        return self.list_reviews(request.user)
+
+    @action(detail=True, permission_classes=(AllowAny,),
+            serializer_class=UserReviewSerializer,
+            pagination_class=PubDateCursorPagination)
+    def reviews(self, request, username=None):
+        return self.list_reviews(
+            get_object_or_404(User.objects.by_username(username)[:1]))
+
 
 class BaseCategoryGenreViewSet(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -66,82 +118,213 @@ class BaseCategoryGenreViewSet(
 class CategoryViewSet(BaseCategoryGenreViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    version_keys = (CATEGORIES_GENERATION_KEY,)
 
 
 class GenreViewSet(BaseCategoryGenreViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    version_keys = (GENRES_GENERATION_KEY,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
-    filter_backends = (DjangoFilterBackend,)
+class TitleViewSet(ConditionalGetMixin, CachedListMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre').order_by('name')
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    ordering_fields = ('name', 'year', 'review_count')
     permission_classes = (IsAdminOrReadOnly,)
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
+    list_cache_generation_key = TITLES_GENERATION_KEY
+    version_keys = (TITLES_GENERATION_KEY,)
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    sparse_columns = {
+        'year': ('year',),
+        'description': ('description',),
+        'category': ('category__name', 'category__slug'),
+        'rating': ('score_sum', 'review_count'),
+        'review_count': ('review_count',),
+    }
+
+    def get_queryset(self):
+        if self.action == 'rating_histogram':
+            return Title.objects.prefetch_related('score_counts')
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        fields = get_sparse_fields(
+            self.request, TitleReadSerializer.Meta.fields)
+        if 'genre' not in fields:
+            queryset = queryset.prefetch_related(None)
+        if 'category' not in fields:
+            queryset = queryset.select_related(None)
+        columns = ['id', 'name']
+        for field in fields:
+            columns.extend(self.sparse_columns.get(field, ()))
+        return queryset.only(*columns)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        facets = self.request.query_params.get('facets')
+        if facets:
+            response.data['facets'] = count_title_facets(
+                self.filter_queryset(self.get_queryset()), facets.split(','))
+        return response
+
     def get_serializer_class(self):
+        if self.action == 'rating_histogram':
+            return TitleRatingHistogramSerializer
         if self.request.method in SAFE_METHODS:
             return TitleReadSerializer
         return TitleWriteSerializer
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = TitleBulkSerializer(
+            data=request.data, many=True, max_length=TITLES_BULK_MAX_SIZE)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False)
+    def top(self, request):
+        params = TopTitlesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ranks = TitleRank.objects.filter(
+            review_count__gte=params.validated_data['min_reviews']
+        )
+        if 'genre' in params.validated_data:
+            ranks = ranks.filter(
+                genre__slug=params.validated_data['genre'])
+        else:
+            ranks = ranks.filter(genre=None)
+        if 'category' in params.validated_data:
+            ranks = ranks.filter(
+                category__slug=params.validated_data['category'])
+        ranks = ranks.select_related('title__category').prefetch_related(
+            'title__genre'
+        ).order_by('-rating', 'title')[:params.validated_data['limit']]
+        serializer = self.get_serializer(
+            [rank.title for rank in ranks], many=True)
+        return Response(serializer.data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    @action(detail=True, url_path='rating-histogram')
+    def rating_histogram(self, request, pk=None):
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
+
+
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (
         IsAuthenticatedOrReadOnly,
         IsAuthorOrAdminOrModerator
     )
-    pagination_class = PageNumberPagination
+    throttle_classes = (WriteRateThrottle,)
+    pagination_class = PubDatePagination
+    filter_backends = (filters.OrderingFilter,)
+    ordering_fields = ('pub_date', 'score', 'comment_count')
     http_method_names = ('get', 'post', 'patch', 'delete', 'head', 'options')
 
-    def _get_title(self):
+    def get_version_keys(self):
+        return (
+            reviews_generation_key(self.kwargs.get('title_id')),
+            USERS_GENERATION_KEY,
+        )
+
+    @cached_property
+    def title(self):
         return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
+    @cached_property
+    def embed_comments(self):
+        if self.action not in ('list', 'retrieve'):
+            return 0
+        params = ReviewQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data['embed_comments']
+
+    def get_serializer_class(self):
+        if self.embed_comments:
+            return ReviewWithCommentsSerializer
+        return super().get_serializer_class()
+
     def get_queryset(self):
-        title = self._get_title()
-        return title.reviews.all().order_by('-pub_date')
+        queryset = self.title.reviews.select_related('author').order_by(
+            '-pub_date', '-id')
+        if self.embed_comments:
+            # Срез в Prefetch Django выполняет одним запросом
+            # с ROW_NUMBER() OVER (PARTITION BY review_id).
+            queryset = queryset.prefetch_related(Prefetch(
+                'comments',
+                queryset=Comment.objects.select_related('author').order_by(
+                    '-pub_date', '-id')[:self.embed_comments],
+                to_attr='latest_comments',
+            ))
+        return queryset
 
     def perform_create(self, serializer):
-        title = self._get_title()
-        serializer.save(author=self.request.user, title=title)
+        # Повторный отзыв отсекает ограничение unique_review_per_author:
+        # предварительная проверка лишний запрос и не защищает от гонки.
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=self.title)
+        except IntegrityError:
+            if not self.title.reviews.filter(
+                author=self.request.user
+            ).exists():
+                raise
+            raise ValidationError({'detail': DUPLICATE_REVIEW_ERROR})
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     http_method_names = ('get', 'post', 'patch', 'delete')
     permission_classes = (IsAuthenticatedOrReadOnly,
                           IsAuthorOrAdminOrModerator)
+    throttle_classes = (WriteRateThrottle,)
+    pagination_class = PubDatePagination
+
+    def get_version_keys(self):
+        return (
+            comments_generation_key(self.kwargs.get('review_id')),
+            USERS_GENERATION_KEY,
+        )
 
-    def _get_comments(self):
+    @cached_property
+    def review(self):
         return get_object_or_404(
             Review,
             pk=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get('title_id')
+            title_id=self.kwargs.get('title_id')
         )
 
     def get_queryset(self):
-        review = self._get_comments()
-        return review.comments.all()
+        return self.review.comments.select_related('author').order_by(
+            '-pub_date', '-id')
 
     def perform_create(self, serializer):
-        review = self._get_comments()
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.review)
 
 
 class SignupView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (AuthRateThrottle, AuthUsernameRateThrottle)
 
     def post(self, request):
         serializer = SignupSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        send_confirmation_code(user)
+        # Письмо попадает в очередь в одной транзакции с пользователем.
+        with transaction.atomic():
+            user = serializer.save()
+            send_confirmation_code(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class TokenView(APIView):
+    throttle_classes = (AuthRateThrottle, AuthUsernameRateThrottle)
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
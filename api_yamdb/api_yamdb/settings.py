@@ -1,3 +1,4 @@
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -62,13 +63,72 @@ AUTH_USER_MODEL = 'reviews.User'
 
 EMAIL_FROM_ADDRESS = 'token@yamdb.ru'
 
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'
+)
+
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+# Письма из очереди после коммита уходят из пула потоков,
+# запрос не ждёт почтовый сервер.
+EMAIL_SEND_ASYNC = True
+
+EMAIL_SEND_WORKERS = 4
+
+OUTBOX_BATCH_SIZE = 50
+
+OUTBOX_MAX_ATTEMPTS = 8
+
+# Паузы между попытками в секундах: 30, 60, 120... но не больше часа.
+OUTBOX_RETRY_DELAY = 30
+
+OUTBOX_RETRY_MAX_DELAY = 60 * 60
+
+OUTBOX_CLAIM_TIMEOUT = 5 * 60
+
+OUTBOX_CIRCUIT_FAILURES = 3
+
+OUTBOX_CIRCUIT_RESET = 60
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Запись сразу берёт блокировку: параллельные транзакции ждут
+        # её в пределах timeout, а не падают с "database is locked".
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        # Тестовая база в файле, а не в памяти: потоки тестов параллельной
+        # записи получают свои соединения к той же базе.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+LIST_CACHE_TIMEOUT = 60 * 5
+
+CACHE_GENERATION_TIMEOUT = 60
+
+PUBLIC_CACHE_MAX_AGE = 60
+
+TITLE_BITMAP_INDEX = False
+
+JWT_AUTH_CACHE_SIZE = 10000
+
+JWT_AUTH_CACHE_TTL = 30
+
+THROTTLE_STORE = 'api.throttling.DatabaseCounterStore'
+
+THROTTLE_CACHE_ALIAS = 'default'
+
+THROTTLE_BLOCKED_CACHE_SIZE = 10000
+
+THROTTLE_PURGE_PROBABILITY = 0.01
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -103,10 +163,19 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Число доверенных прокси перед приложением: при 0 IP клиента берётся
+    # из REMOTE_ADDR, а X-Forwarded-For, который подделывает клиент,
+    # не учитывается.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': '20/min',
+        'auth_username': '5/min',
+        'writes': '30/min',
+    },
 }
 
 
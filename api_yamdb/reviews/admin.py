@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from reviews.search import search_titles
+from reviews.signals import titles_bulk_saved
 
 
 @admin.register(User)
@@ -32,17 +35,39 @@ class GenreAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 
+class GenreTitleInline(admin.TabularInline):
+    # Поле genre со своей промежуточной моделью админка не показывает,
+    # поэтому жанры произведения редактируются строками GenreTitle.
+    model = GenreTitle
+    autocomplete_fields = ('genre',)
+    extra = 1
+
+
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
     list_display = ('name', 'year', 'category', 'display_genres')
     search_fields = ('name',)
     list_filter = ('category', 'year')
     list_editable = ('category',)
+    inlines = (GenreTitleInline,)
 
     @admin.display(description='Жанры')
     def display_genres(self, obj):
         return ', '.join(genre.name for genre in obj.genre.all())
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_titles(queryset, search_term), False
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Строки GenreTitle не отправляют m2m_changed: рейтинги, поиск,
+        # битовый индекс и кеш списка обновляются как после bulk-записи.
+        titles_bulk_saved.send(
+            sender=Title, titles=[form.instance],
+            using=form.instance._state.db)
+
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
     verbose_name = 'Портал отзывов на произведения'
+
+    def ready(self):
+        from reviews.signals import install_title_search, install_user_search
+        post_migrate.connect(install_title_search, sender=self)
+        post_migrate.connect(install_user_search, sender=self)
@@ -2,6 +2,26 @@ MIN_SCORE = 1
 
 MAX_SCORE = 10
 
+PRIOR_SCORE = (MIN_SCORE + MAX_SCORE) / 2
+
+PRIOR_REVIEW_COUNT = 5
+
+RECOUNT_BATCH_SIZE = 1000
+
+TITLES_BULK_MAX_SIZE = 5000
+
+YEAR_FACET_BUCKET = 10
+
+TITLE_BITMAP_MAX_IDS = 10000
+
+TOP_TITLES_LIMIT = 10
+
+TOP_TITLES_MAX_LIMIT = 100
+
+TOP_TITLES_MIN_REVIEWS = 3
+
+EMBED_COMMENTS_MAX = 10
+
 MAX_USERNAME_LENGTH = 150
 
 MAX_EMAIL_LENGTH = 254
@@ -15,3 +35,7 @@ FORBIDDEN_USERNAME = 'me'
 USERNAME_REGEX = r'^[\w.@+-]+\Z'
 
 SCORE_ERROR = 'Оценка должна быть от {min} до {max} баллов.'
+
+DUPLICATE_REVIEW_ERROR = 'Вы уже оставляли отзыв на это произведение.'
+
+TITLE_SEARCH_CONFIG = 'russian'
@@ -3,6 +3,7 @@ import csv
 
 from django.apps import apps
 from django.db.models import ForeignKey
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 
 DATA_DIR = 'static/data'
@@ -51,6 +52,11 @@ class Command(BaseCommand):
             model.objects.bulk_create(objects_to_create)
             self.stdout.write(self.style.SUCCESS(
                 f'Импортировано: {model_name}'))
+        # bulk_create не отправляет сигналы, счётчики и индекс
+        # собираем заново.
+        call_command('recount_title_ratings', stdout=self.stdout)
+        call_command('rebuild_title_search', stdout=self.stdout)
+        call_command('rebuild_user_search', stdout=self.stdout)
 
     def get_model(self, model_name):
         for app_label in ('reviews', 'api'):
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reviews.search import get_title_search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        get_title_search(options['database']).rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            'Поисковый индекс произведений перестроен'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reviews.search import get_user_search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает триграммный индекс имён пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        get_user_search(options['database']).rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            'Поисковый индекс пользователей перестроен'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики и гистограммы оценок произведений '
+            'и счётчики комментариев их отзывов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('title_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        titles = Title.objects.all()
+        if options['title_ids']:
+            titles = titles.filter(pk__in=options['title_ids'])
+        updated = titles.recount_scores()
+        Review.objects.filter(title__in=titles).recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитан рейтинг произведений: {updated}'))
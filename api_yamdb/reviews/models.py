@@ -1,7 +1,10 @@
 from django.conf import settings
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Value, When
+from django.db.models.functions import Cast, Coalesce, Lower, NullIf
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
 from reviews.constants import (
@@ -10,6 +13,9 @@ from reviews.constants import (
     MAX_SCORE,
     MAX_USERNAME_LENGTH,
     MIN_SCORE,
+    PRIOR_REVIEW_COUNT,
+    PRIOR_SCORE,
+    RECOUNT_BATCH_SIZE,
     SCORE_ERROR,
     USERNAME_REGEX,
 )
@@ -21,6 +27,25 @@ username_validator = RegexValidator(
 )
 
 
+class UserQuerySet(models.QuerySet):
+    def by_username(self, username):
+        """Поиск по username без учёта регистра через индекс по LOWER.
+
+        Если имена различаются только регистром, первым идёт точное
+        совпадение.
+        """
+        return self.alias(username_lower=Lower('username')).filter(
+            username_lower=Lower(Value(username))
+        ).order_by(
+            Case(When(username=username, then=Value(0)), default=Value(1)),
+            'pk',
+        )
+
+
+class YamdbUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     USER = 'user'
     MODERATOR = 'moderator'
@@ -56,10 +81,15 @@ class User(AbstractUser):
         verbose_name='Имя пользователя'
     )
 
+    objects = YamdbUserManager()
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ['username']
+        indexes = [
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+        ]
 
     def __str__(self):
         return self.username
@@ -98,7 +128,61 @@ class Genre(BaseCategoryGenreModel):
         verbose_name_plural = 'Жанры'
 
 
-class Title(models.Model):
+class CountersMixin:
+    """Не перезаписывает денормализованные счётчики при сохранении.
+
+    Счётчики меняются только UPDATE с F() из сигналов, а сохранение
+    загруженного ранее объекта иначе затёрло бы параллельные изменения.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class TitleQuerySet(models.QuerySet):
+    def recount_scores(self):
+        """Пересчитывает счётчики оценок произведений по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=models.OuterRef('pk')
+        ).order_by().values('title')
+        updated = self.update(
+            score_sum=Coalesce(models.Subquery(
+                reviews.annotate(total=models.Sum('score')).values('total')
+            ), 0),
+            review_count=Coalesce(models.Subquery(
+                reviews.annotate(total=models.Count('pk')).values('total')
+            ), 0),
+        )
+        title_ids = []
+        for title_id in self.values_list('pk', flat=True).iterator():
+            title_ids.append(title_id)
+            if len(title_ids) == RECOUNT_BATCH_SIZE:
+                TitleScoreCount.objects.create_for_titles(title_ids)
+                TitleRank.objects.rebuild_for_titles(title_ids)
+                title_ids = []
+        TitleScoreCount.objects.create_for_titles(title_ids)
+        TitleRank.objects.rebuild_for_titles(title_ids)
+        TitleScoreCount.objects.filter(title__in=self).update(
+            review_count=Coalesce(models.Subquery(
+                Review.objects.filter(
+                    title=models.OuterRef('title'),
+                    score=models.OuterRef('score'),
+                ).order_by().values('title').annotate(
+                    total=models.Count('pk')
+                ).values('total')
+            ), 0),
+        )
+        return updated
+
+
+class Title(CountersMixin, models.Model):
     name = models.CharField(
         max_length=MAX_CATEGORY_AND_GENRE_LENGTH,
         verbose_name='Название произведения'
@@ -114,6 +198,7 @@ class Title(models.Model):
     )
     genre = models.ManyToManyField(
         Genre,
+        through='GenreTitle',
         related_name='titles',
         verbose_name='Жанр'
     )
@@ -124,15 +209,263 @@ class Title(models.Model):
         null=True,
         verbose_name='Категория'
     )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов'
+    )
+
+    objects = TitleQuerySet.as_manager()
+
+    counter_fields = ('score_sum', 'review_count')
 
     class Meta:
         ordering = ['name']
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+            models.Index(
+                fields=['category', 'year'], name='title_category_year_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        if not self.review_count:
+            return None
+        return self.score_sum / self.review_count
+
+    @property
+    def weighted_rating(self):
+        """Байесовский рейтинг: оценки дополняются априорными."""
+        return (
+            (self.score_sum + PRIOR_SCORE * PRIOR_REVIEW_COUNT)
+            / (self.review_count + PRIOR_REVIEW_COUNT)
+        )
+
+
+class FullTextField(models.TextField):
+    """Скрытая колонка FTS5 с именем таблицы: поддерживает lookup match."""
+
+
+@FullTextField.register_lookup
+class FullTextMatch(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class TitleSearchDocument(models.Model):
+    """Строка таблицы FTS5 поиска произведений в SQLite.
+
+    Таблицу создаёт reviews.search после migrate; модель нужна, чтобы
+    присоединять индекс к выборке JOIN по rowid и брать rank из того же
+    прохода MATCH.
+    """
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search_document'
+    )
+    document = FullTextField(db_column='reviews_title_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'reviews_title_fts'
+
+
+class GenreTitle(models.Model):
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        verbose_name='Произведение'
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        verbose_name='Жанр'
+    )
+
+    class Meta:
+        db_table = 'reviews_title_genre'
+        verbose_name = 'Жанр произведения'
+        verbose_name_plural = 'Жанры произведений'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'genre'],
+                name='unique_genre_per_title',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['genre', 'title'], name='genre_title_genre_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title}: {self.genre}'
+
+
+class TitleScoreCountQuerySet(models.QuerySet):
+    def create_for_titles(self, title_ids):
+        """Создаёт недостающие нулевые счётчики для каждой оценки."""
+        return self.bulk_create(
+            [
+                self.model(title_id=title_id, score=score)
+                for title_id in title_ids
+                for score in range(MIN_SCORE, MAX_SCORE + 1)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class TitleScoreCount(models.Model):
+    """Число отзывов произведения с данной оценкой."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts',
+        verbose_name='Произведение'
+    )
+    score = models.PositiveSmallIntegerField(verbose_name='Оценка')
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+
+    objects = TitleScoreCountQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['score']
+        verbose_name = 'Счётчик оценок'
+        verbose_name_plural = 'Счётчики оценок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'score'],
+                name='unique_score_count_per_title',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title}: {self.score} — {self.review_count}'
+
+
+class TitleRankQuerySet(models.QuerySet):
+    def refresh_scores(self):
+        """Копирует рейтинг и число отзывов из строк произведений."""
+        titles = Title.objects.filter(pk=models.OuterRef('title'))
+        return self.update(
+            review_count=models.Subquery(titles.values('review_count')),
+            rating=models.Subquery(titles.annotate(
+                value=Cast('score_sum', models.FloatField())
+                / NullIf('review_count', 0)
+            ).values('value')),
+        )
+
+    def rebuild_for_titles(self, title_ids):
+        """Пересоздаёт строки рейтинга для жанров и категории."""
+        with transaction.atomic():
+            # Блокировка произведений упорядочивает параллельные пересборки
+            # одних и тех же строк.
+            titles = list(Title.objects.select_for_update().filter(
+                pk__in=title_ids
+            ).only('category', 'score_sum', 'review_count').order_by('pk'))
+            self.filter(title_id__in=title_ids).delete()
+            genre_ids = {title_id: [None] for title_id in title_ids}
+            for title_id, genre_id in Title.genre.through.objects.filter(
+                title_id__in=title_ids
+            ).values_list('title_id', 'genre_id'):
+                genre_ids[title_id].append(genre_id)
+            return self.bulk_create([
+                self.model(
+                    title=title,
+                    genre_id=genre_id,
+                    category_id=title.category_id,
+                    rating=title.rating,
+                    review_count=title.review_count,
+                )
+                for title in titles
+                for genre_id in genre_ids[title.pk]
+            ])
+
+
+class TitleRank(models.Model):
+    """Строка таблицы лучших произведений.
+
+    На каждое произведение приходится строка без жанра и по строке на
+    каждый его жанр, так что топ по жанру и категории читается по индексу.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='ranks',
+        verbose_name='Произведение'
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+        verbose_name='Жанр'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='Категория'
+    )
+    rating = models.FloatField(null=True, verbose_name='Рейтинг')
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+
+    objects = TitleRankQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтинге'
+        indexes = [
+            models.Index(
+                fields=['genre', '-rating', 'title'],
+                name='title_rank_genre_idx',
+            ),
+            models.Index(
+                fields=['genre', 'category', '-rating', 'title'],
+                name='title_rank_genre_category_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'genre'],
+                name='unique_rank_per_title_genre',
+            ),
+            models.UniqueConstraint(
+                fields=['title'],
+                condition=models.Q(genre=None),
+                name='unique_rank_per_title',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title}: {self.rating}'
+
 
 class PubAuthorModel(models.Model):
     """Абстрактная модель с общими полями для Review и Comment"""
@@ -156,13 +489,34 @@ class PubAuthorModel(models.Model):
         return f'{self._meta.verbose_name} от {self.author.username}'
 
 
-class Review(PubAuthorModel):
+class ReviewQuerySet(models.QuerySet):
+    def recount_comments(self):
+        """Пересчитывает счётчики комментариев по таблице комментариев."""
+        return self.update(comment_count=Coalesce(models.Subquery(
+            Comment.objects.filter(
+                review=models.OuterRef('pk')
+            ).order_by().values('review').annotate(
+                total=models.Count('pk')
+            ).values('total')
+        ), 0))
+
+
+class Review(CountersMixin, PubAuthorModel):
     title = models.ForeignKey(
         'Title',
         on_delete=models.CASCADE,
         verbose_name='Произведение',
     )
     score = models.PositiveSmallIntegerField(verbose_name='Оценка')
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+
+    objects = ReviewQuerySet.as_manager()
+
+    counter_fields = ('comment_count',)
 
     class Meta(PubAuthorModel.Meta):
         verbose_name = 'Отзыв'
@@ -173,10 +527,31 @@ class Review(PubAuthorModel):
                 name='unique_review_per_author',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date'],
+                name='review_title_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='review_author_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'Отзыв на {self.title} от {self.author.username}'
 
+    def save(self, *args, **kwargs):
+        # Счётчики произведения обновляются в post_save,
+        # поэтому сигнал должен выполниться в той же транзакции.
+        with transaction.atomic():
+            if not self._state.adding:
+                # Изменение счётчиков считается от сохранённой оценки:
+                # блокировка строки упорядочивает параллельные правки.
+                self._stored_score = Review.objects.select_for_update(
+                ).filter(pk=self.pk).values_list('title_id', 'score').first()
+            super().save(*args, **kwargs)
+
     def clean(self):
         if not (MIN_SCORE <= self.score <= MAX_SCORE):
             raise ValidationError(
@@ -194,7 +569,124 @@ class Comment(PubAuthorModel):
     class Meta(PubAuthorModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date'],
+                name='comment_review_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return ('Комментарий к отзыву'
                 f' {self.review.id} от {self.author.username}')
+
+    def save(self, *args, **kwargs):
+        # Счётчик комментариев отзыва обновляется в post_save.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class OutboxEmailQuerySet(models.QuerySet):
+    def due(self, now):
+        return self.filter(
+            sent_at=None, failed_at=None, next_attempt_at__lte=now)
+
+
+class OutboxEmail(models.Model):
+    """Письмо, записанное в одной транзакции с вызвавшими его данными."""
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    recipients = models.JSONField(verbose_name='Получатели')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки отправки'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    claimed_by = models.UUIDField(
+        null=True,
+        blank=True,
+        verbose_name='Обработчик'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+    failed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отказа'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+
+    objects = OutboxEmailQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'failed_at', 'next_attempt_at'],
+                name='outbox_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} для {", ".join(self.recipients)}'
+
+
+class UserTrigramDocument(models.Model):
+    """Строка триграммной таблицы FTS5 поиска пользователей в SQLite."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='trigram_document'
+    )
+    document = FullTextField(db_column='reviews_user_trigram')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'reviews_user_trigram'
+
+
+class ThrottleCounter(models.Model):
+    """Счётчики скользящего окна ограничения частоты запросов."""
+    key = models.CharField(
+        max_length=255,
+        primary_key=True,
+        verbose_name='Ключ'
+    )
+    window_start = models.BigIntegerField(verbose_name='Номер окна')
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Запросы в текущем окне'
+    )
+    previous_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Запросы в предыдущем окне'
+    )
+    expires_at = models.BigIntegerField(
+        verbose_name='Устаревает после (Unix-время)'
+    )
+
+    class Meta:
+        verbose_name = 'Счётчик запросов'
+        verbose_name_plural = 'Счётчики запросов'
+        indexes = [
+            models.Index(
+                fields=['expires_at'], name='throttle_expires_at_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.key}: {self.count}'
@@ -0,0 +1,387 @@
+"""Полнотекстовый поиск произведений и поиск пользователей.
+
+В SQLite индекс произведений хранится в теневой таблице FTS5,
+в PostgreSQL — в колонке tsvector с GIN-индексом. Индекс создаётся после
+migrate и обновляется сигналами модели Title; на остальных СУБД поиск
+сводится к icontains.
+
+Пользователи ищутся по началу username без учёта регистра диапазоном
+по индексу LOWER(username). Для нечёткого поиска по триграммам в SQLite
+ведётся таблица FTS5 с токенизатором trigram, в PostgreSQL — GIN-индекс
+pg_trgm, если расширение удалось установить.
+"""
+import logging
+import re
+import string
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+
+from reviews.constants import TITLE_SEARCH_CONFIG
+from reviews.models import (Title, TitleSearchDocument, User,
+                            UserTrigramDocument)
+
+logger = logging.getLogger(__name__)
+
+TITLE_TABLE = Title._meta.db_table
+FTS_TABLE = TitleSearchDocument._meta.db_table
+WORD_PATTERN = re.compile(r'\w+')
+USER_TABLE = User._meta.db_table
+USER_TRIGRAM_TABLE = UserTrigramDocument._meta.db_table
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+# Токенизатор trigram появился в SQLite 3.34.
+SQLITE_TRIGRAM_VERSION = (3, 34, 0)
+
+
+class TitleSearch:
+    """Поиск без индекса, для СУБД без полнотекстовых возможностей."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def index(self, titles):
+        pass
+
+    def remove(self, title_id):
+        pass
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(name__icontains=query) | Q(description__icontains=query)
+        )
+
+
+class SQLiteTitleSearch(TitleSearch):
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+                'USING fts5(name, description, '
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            # rank — bm25 с весом названия 10 и описания 1.
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) '
+                "VALUES ('rank', 'bm25(10.0, 1.0)')"
+            )
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} '
+                f'WHERE rowid NOT IN (SELECT id FROM {TITLE_TABLE})'
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+                f"SELECT id, name, COALESCE(description, '') "
+                f'FROM {TITLE_TABLE} '
+                f'WHERE id NOT IN (SELECT rowid FROM {FTS_TABLE})'
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        self.install()
+
+    def index(self, titles):
+        rows = [
+            (title.pk, title.name, title.description or '')
+            for title in titles
+        ]
+        if not rows:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                f'({", ".join(["%s"] * len(rows))})',
+                [row[0] for row in rows]
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+                'VALUES (%s, %s, %s)',
+                rows
+            )
+
+    def remove(self, title_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (title_id,)
+            )
+
+    def search(self, queryset, query):
+        words = WORD_PATTERN.findall(query)
+        if not words:
+            return queryset.none()
+        match = ' '.join(f'"{word}"*' for word in words)
+        # MATCH и rank считаются за один проход по индексу, а строки
+        # произведений присоединяются по rowid.
+        return queryset.filter(
+            search_document__document__match=match
+        ).annotate(search_rank=-F('search_document__rank'))
+
+
+class PostgresTitleSearch(TitleSearch):
+    VECTOR = (
+        'setweight(to_tsvector(%s, name), \'A\') || '
+        'setweight(to_tsvector(%s, COALESCE(description, \'\')), \'B\')'
+    )
+    QUERY = 'websearch_to_tsquery(%s, %s)'
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'ALTER TABLE {TITLE_TABLE} '
+                'ADD COLUMN IF NOT EXISTS search_vector tsvector'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {TITLE_TABLE}_search_idx '
+                f'ON {TITLE_TABLE} USING GIN (search_vector)'
+            )
+            cursor.execute(
+                f'UPDATE {TITLE_TABLE} SET search_vector = {self.VECTOR} '
+                'WHERE search_vector IS NULL',
+                (TITLE_SEARCH_CONFIG, TITLE_SEARCH_CONFIG)
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'UPDATE {TITLE_TABLE} SET search_vector = NULL')
+        self.install()
+
+    def index(self, titles):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {TITLE_TABLE} SET search_vector = {self.VECTOR} '
+                'WHERE id = ANY(%s)',
+                (
+                    TITLE_SEARCH_CONFIG,
+                    TITLE_SEARCH_CONFIG,
+                    [title.pk for title in titles],
+                )
+            )
+
+    def search(self, queryset, query):
+        params = (TITLE_SEARCH_CONFIG, query)
+        return queryset.filter(RawSQL(
+            f'{TITLE_TABLE}.search_vector @@ {self.QUERY}',
+            params,
+            output_field=BooleanField()
+        )).annotate(search_rank=RawSQL(
+            f'ts_rank({TITLE_TABLE}.search_vector, {self.QUERY})',
+            params,
+            output_field=FloatField()
+        ))
+
+
+SEARCH_BY_VENDOR = {
+    'sqlite': SQLiteTitleSearch,
+    'postgresql': PostgresTitleSearch,
+}
+
+
+def get_title_search(using='default'):
+    connection = connections[using]
+    return SEARCH_BY_VENDOR.get(connection.vendor, TitleSearch)(connection)
+
+
+def search_titles(queryset, query):
+    """Отбирает произведения по запросу, лучшие совпадения — первыми."""
+    queryset = get_title_search(queryset.db).search(queryset, query)
+    if 'search_rank' in queryset.query.annotations:
+        return queryset.order_by('-search_rank', 'name')
+    return queryset
+
+
+class UserSearch:
+    """Поиск пользователей без специальных индексов."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def index(self, users):
+        pass
+
+    def remove(self, user_id):
+        pass
+
+    def prefix(self, queryset, prefix):
+        return queryset.alias(username_lower=Lower('username')).filter(
+            username_lower__startswith=prefix.lower())
+
+    def similar(self, queryset, query):
+        return queryset.filter(username__icontains=query)
+
+
+class SQLiteUserSearch(UserSearch):
+    def supports_trigrams(self):
+        return (
+            self.connection.Database.sqlite_version_info
+            >= SQLITE_TRIGRAM_VERSION
+        )
+
+    def has_trigrams(self):
+        if not self.supports_trigrams():
+            return False
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                'AND name = %s', (USER_TRIGRAM_TABLE,))
+            return cursor.fetchone() is not None
+
+    def install(self):
+        if not self.supports_trigrams():
+            logger.warning(
+                'SQLite без токенизатора trigram, нечёткий поиск '
+                'пользователей отключён')
+            return
+        try:
+            with transaction.atomic(using=self.connection.alias):
+                with self.connection.cursor() as cursor:
+                    cursor.execute(
+                        'CREATE VIRTUAL TABLE IF NOT EXISTS '
+                        f'{USER_TRIGRAM_TABLE} '
+                        "USING fts5(username, tokenize='trigram')"
+                    )
+                    cursor.execute(
+                        f'DELETE FROM {USER_TRIGRAM_TABLE} '
+                        f'WHERE rowid NOT IN (SELECT id FROM {USER_TABLE})'
+                    )
+                    cursor.execute(
+                        f'INSERT INTO {USER_TRIGRAM_TABLE} (rowid, username) '
+                        f'SELECT id, username FROM {USER_TABLE} WHERE id '
+                        f'NOT IN (SELECT rowid FROM {USER_TRIGRAM_TABLE})'
+                    )
+        except DatabaseError:
+            logger.warning(
+                'Таблица FTS5 с токенизатором trigram недоступна, нечёткий '
+                'поиск пользователей отключён')
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {USER_TRIGRAM_TABLE}')
+        self.install()
+
+    def index(self, users):
+        rows = [(user.pk, user.username) for user in users]
+        if not rows or not self.supports_trigrams():
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {USER_TRIGRAM_TABLE} '
+                '(rowid, username) VALUES (%s, %s)',
+                rows
+            )
+
+    def remove(self, user_id):
+        if not self.supports_trigrams():
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {USER_TRIGRAM_TABLE} WHERE rowid = %s',
+                (user_id,)
+            )
+
+    def prefix(self, queryset, prefix):
+        # LOWER в SQLite меняет регистр только латиницы, и граница
+        # диапазона строится так же; сравнение строк побайтовое.
+        prefix = prefix.translate(ASCII_LOWER)
+        return queryset.alias(username_lower=Lower('username')).filter(
+            username_lower__gte=prefix,
+            username_lower__lt=prefix + chr(0x10FFFF),
+        )
+
+    def similar(self, queryset, query):
+        trigrams = {
+            query[start:start + 3] for start in range(len(query) - 2)
+        }
+        if not trigrams:
+            return self.prefix(queryset, query)
+        if not self.has_trigrams():
+            return super().similar(queryset, query)
+        match = ' OR '.join(
+            '"{}"'.format(trigram.replace('"', '""'))
+            for trigram in sorted(trigrams)
+        )
+        return queryset.filter(
+            trigram_document__document__match=match
+        ).annotate(search_rank=-F('trigram_document__rank'))
+
+
+class PostgresUserSearch(UserSearch):
+    def install(self):
+        with self.connection.cursor() as cursor:
+            # Индекс с text_pattern_ops обслуживает LIKE 'префикс%'
+            # при любой collation базы.
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {USER_TABLE}_prefix_idx '
+                f'ON {USER_TABLE} (LOWER(username) text_pattern_ops)'
+            )
+        try:
+            with transaction.atomic(using=self.connection.alias):
+                with self.connection.cursor() as cursor:
+                    cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                    cursor.execute(
+                        f'CREATE INDEX IF NOT EXISTS {USER_TABLE}_trgm_idx '
+                        f'ON {USER_TABLE} '
+                        'USING GIN (LOWER(username) gin_trgm_ops)'
+                    )
+        except DatabaseError:
+            logger.warning(
+                'Расширение pg_trgm недоступно, нечёткий поиск '
+                'пользователей отключён')
+
+    def has_trigrams(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            return cursor.fetchone() is not None
+
+    def similar(self, queryset, query):
+        if not self.has_trigrams():
+            return super().similar(queryset, query)
+        return queryset.filter(RawSQL(
+            f'LOWER({USER_TABLE}.username) %% LOWER(%s)',
+            (query,),
+            output_field=BooleanField()
+        )).annotate(search_rank=RawSQL(
+            f'similarity(LOWER({USER_TABLE}.username), LOWER(%s))',
+            (query,),
+            output_field=FloatField()
+        ))
+
+
+USER_SEARCH_BY_VENDOR = {
+    'sqlite': SQLiteUserSearch,
+    'postgresql': PostgresUserSearch,
+}
+
+
+def get_user_search(using='default'):
+    connection = connections[using]
+    return USER_SEARCH_BY_VENDOR.get(connection.vendor, UserSearch)(
+        connection)
+
+
+def search_users(queryset, prefix):
+    """Пользователи, чей username начинается с prefix без учёта регистра."""
+    return get_user_search(queryset.db).prefix(queryset, prefix).order_by(
+        Lower('username'), 'pk')
+
+
+def find_similar_users(queryset, query):
+    """Пользователи с username, похожим на query, ближайшие — первыми."""
+    queryset = get_user_search(queryset.db).similar(queryset, query)
+    if 'search_rank' in queryset.query.annotations:
+        return queryset.order_by('-search_rank', 'username')
+    return queryset.order_by(Lower('username'), 'pk')
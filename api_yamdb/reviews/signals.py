@@ -0,0 +1,132 @@
+from django.db.models import F, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from reviews.models import (Comment, Review, Title, TitleRank, TitleScoreCount,
+                            User)
+from reviews.search import get_title_search, get_user_search
+
+# Отправляется после bulk_create/bulk_update произведений,
+# которые не вызывают post_save.
+titles_bulk_saved = Signal()
+
+
+def change_title_score(title_id, score, count_delta):
+    Title.objects.filter(pk=title_id).update(
+        score_sum=F('score_sum') + score * count_delta,
+        review_count=F('review_count') + count_delta,
+    )
+    TitleScoreCount.objects.filter(title_id=title_id, score=score).update(
+        review_count=F('review_count') + count_delta,
+    )
+    TitleRank.objects.filter(title_id=title_id).refresh_scores()
+
+
+@receiver(post_save, sender=Review)
+def update_title_score_on_save(sender, instance, created, **kwargs):
+    score = int(instance.score)
+    if created:
+        change_title_score(instance.title_id, score, 1)
+        return
+    stored = instance.__dict__.pop('_stored_score', None)
+    if stored is None:
+        Title.objects.filter(pk=instance.title_id).recount_scores()
+    elif stored != (instance.title_id, score):
+        change_title_score(*stored, -1)
+        change_title_score(instance.title_id, score, 1)
+
+
+def deleted_with(origin, *senders):
+    """Удаление запущено для экземпляра или QuerySet одной из моделей."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, senders)
+
+
+@receiver(post_delete, sender=Review)
+def update_title_score_on_delete(sender, instance, origin=None, **kwargs):
+    # При каскаде от произведения его счётчики удаляются вместе с ним.
+    if origin is not None and deleted_with(origin, Title):
+        return
+    change_title_score(instance.title_id, int(instance.score), -1)
+
+
+def change_review_comment_count(review_id, count_delta):
+    Review.objects.filter(pk=review_id).update(
+        comment_count=F('comment_count') + count_delta,
+    )
+
+
+@receiver(post_save, sender=Comment)
+def increase_review_comment_count(sender, instance, created, **kwargs):
+    if created:
+        change_review_comment_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_review_comment_count(sender, instance, origin=None, **kwargs):
+    # При каскаде от отзыва или произведения отзыв удаляется вместе
+    # с комментариями, и счётчик обновлять незачем.
+    if origin is not None and deleted_with(origin, Review, Title):
+        return
+    change_review_comment_count(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Title)
+def create_title_score_counts(sender, instance, created, **kwargs):
+    if created:
+        TitleScoreCount.objects.create_for_titles([instance.pk])
+
+
+@receiver(post_save, sender=Title)
+def rebuild_title_ranks(sender, instance, **kwargs):
+    TitleRank.objects.rebuild_for_titles([instance.pk])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def rebuild_title_ranks_on_genres(sender, instance, action, reverse, pk_set,
+                                  **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        TitleRank.objects.rebuild_for_titles([instance.pk])
+    elif action == 'post_clear':
+        TitleRank.objects.filter(genre=instance).delete()
+    else:
+        TitleRank.objects.rebuild_for_titles(list(pk_set))
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, using, **kwargs):
+    get_title_search(using).index([instance])
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, using, **kwargs):
+    get_title_search(using).remove(instance.pk)
+
+
+@receiver(titles_bulk_saved, sender=Title)
+def update_bulk_saved_titles(sender, titles, using, **kwargs):
+    title_ids = [title.pk for title in titles]
+    TitleScoreCount.objects.create_for_titles(title_ids)
+    TitleRank.objects.rebuild_for_titles(title_ids)
+    get_title_search(using).index(titles)
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, using, update_fields, **kwargs):
+    if update_fields is None or 'username' in update_fields:
+        get_user_search(using).index([instance])
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, using, **kwargs):
+    get_user_search(using).remove(instance.pk)
+
+
+def install_title_search(sender, using='default', **kwargs):
+    get_title_search(using).install()
+
+
+def install_user_search(sender, using='default', **kwargs):
+    get_user_search(using).install()
@@ -27,5 +27,6 @@ if FILENAME not in project_dir_content:
     )
 
 pytest_plugins = [
+    'tests.fixtures.fixture_mail',
     'tests.fixtures.fixture_user',
 ]
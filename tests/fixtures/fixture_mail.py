@@ -0,0 +1,6 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def send_mail_synchronously(settings):
+    settings.EMAIL_SEND_ASYNC = False
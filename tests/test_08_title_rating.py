@@ -0,0 +1,139 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_title(self, title_id):
+        from reviews.models import Title
+        return Title.objects.get(pk=title_id)
+
+    def test_01_counters_follow_reviews(self, admin_client, admin, user,
+                                        user_client, moderator,
+                                        moderator_client, client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (15, 3), (
+            'Проверьте, что при создании отзыва обновляются сумма оценок '
+            'и количество отзывов произведения.'
+        )
+
+        response = user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[1]['id']
+            ),
+            data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (18, 3), (
+            'Проверьте, что при изменении оценки отзыва пересчитывается '
+            'сумма оценок произведения.'
+        )
+
+        response = moderator_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (13, 2), (
+            'Проверьте, что при удалении отзыва уменьшаются сумма оценок '
+            'и количество отзывов произведения.'
+        )
+
+        moderator.delete()
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (8, 1), (
+            'Проверьте, что при удалении пользователя счётчики '
+            'произведений, на которые он оставлял отзывы, уменьшаются.'
+        )
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert response.json().get('rating') == 8, (
+            'Проверьте, что поле `rating` вычисляется из счётчиков '
+            'произведения.'
+        )
+
+    def test_02_recount_command(self, admin_client, user_client):
+        from reviews.models import Title
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Так себе', 3)
+        create_single_review(user_client, titles[1]['id'], 'Отлично', 9)
+        Title.objects.update(score_sum=100, review_count=100)
+
+        call_command('recount_title_ratings')
+
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (3, 1), (
+            'Проверьте, что команда `recount_title_ratings` восстанавливает '
+            'счётчики произведения по таблице отзывов.'
+        )
+        title = self.get_title(titles[1]['id'])
+        assert title.rating == 9, (
+            'Проверьте, что команда `recount_title_ratings` пересчитывает '
+            'все произведения.'
+        )
+
+    def test_03_stale_review_copies(self, admin_client, user_client):
+        from reviews.models import Review, TitleScoreCount
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Так себе', 5).json()
+        first, second = (
+            Review.objects.get(pk=review['id']) for _ in range(2)
+        )
+        first.score = 7
+        first.save()
+        second.score = 3
+        second.save()
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (3, 1), (
+            'Проверьте, что изменение счётчиков считается от сохранённой '
+            'оценки отзыва, а не от загруженной копии.'
+        )
+        assert dict(TitleScoreCount.objects.filter(
+            title_id=titles[0]['id'], review_count__gt=0
+        ).values_list('score', 'review_count')) == {3: 1}
+
+    def test_04_title_delete_skips_review_counters(self, django_user_model):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Review, Title
+        authors = [
+            django_user_model.objects.create(
+                username=f'rating_{number}',
+                email=f'rating_{number}@yamdb.fake')
+            for number in range(4)
+        ]
+        counts = []
+        for review_count in (1, 4):
+            title = Title.objects.create(name='Произведение', year=2000)
+            for author in authors[:review_count]:
+                Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=5)
+            with CaptureQueriesContext(connection) as context:
+                title.delete()
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что при удалении произведения счётчики оценок '
+            'не обновляются для каждого его отзыва.'
+        )
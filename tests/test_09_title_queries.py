@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_genre, create_titles
+
+TITLES_LIST_QUERIES = 3
+TITLE_DETAIL_QUERIES = 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def add_titles(self, count):
+        from reviews.models import Category, Genre, Title
+        category = Category.objects.create(name='Сериалы', slug='series')
+        genres = [
+            Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(3)
+        ]
+        for idx in range(count):
+            title = Title.objects.create(
+                name=f'Сериал {idx}', year=2000, category=category
+            )
+            title.genre.set(genres)
+
+    def test_01_titles_list_queries(self, client, admin_client,
+                                    django_assert_num_queries):
+        create_titles(admin_client)
+        with django_assert_num_queries(TITLES_LIST_QUERIES):
+            client.get(self.TITLES_URL)
+
+        self.add_titles(8)
+        with django_assert_num_queries(TITLES_LIST_QUERIES):
+            response = client.get(self.TITLES_URL)
+        assert len(response.json()['results']) == 10, (
+            f'Проверьте, что ответ на GET-запрос к `{self.TITLES_URL}` '
+            'содержит полную страницу произведений.'
+        )
+
+    def test_02_title_detail_queries(self, client, admin_client,
+                                     django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        with django_assert_num_queries(TITLE_DETAIL_QUERIES):
+            response = client.get(
+                self.TITLES_DETAIL_URL_TEMPLATE.format(
+                    title_id=titles[0]['id']
+                )
+            )
+        assert len(response.json()['genre']) == 2, (
+            f'Проверьте, что ответ на GET-запрос к '
+            f'`{self.TITLES_DETAIL_URL_TEMPLATE}` содержит жанры '
+            'произведения.'
+        )
+
+    def test_03_title_genres_single_lookup(self, admin_client):
+        genres = create_genre(admin_client)
+        self.add_titles(0)
+        data = {
+            'name': 'Сериал',
+            'year': 2001,
+            'genre': [genre['slug'] for genre in genres],
+            'category': 'series',
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        genre_lookups = [
+            query for query in queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_genre"' in query['sql']
+            and '"reviews_genre"."slug" IN' in query['sql']
+        ]
+        assert len(genre_lookups) == 1, (
+            f'Проверьте, что POST-запрос к `{self.TITLES_URL}` находит все '
+            'жанры произведения одним запросом.'
+        )
+
+        data['genre'] = [genres[0]['slug'], 'unknown', 'missing']
+        response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert len(response.json()['genre']) == 2, (
+            f'Проверьте, что POST-запрос к `{self.TITLES_URL}` сообщает обо '
+            'всех несуществующих жанрах сразу.'
+        )
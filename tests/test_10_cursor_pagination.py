@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+def collect_cursor_pages(client, url):
+    results = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` в курсорном режиме '
+            'возвращает ответ со статусом 200.'
+        )
+        data = response.json()
+        assert 'count' not in data and 'next' in data, (
+            f'Проверьте, что `{url}` в курсорном режиме отдаёт ссылки '
+            '`next`/`previous` без ключа `count`.'
+        )
+        results.extend(data['results'])
+        url = data['next']
+    return results
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    TITLES_CURSOR_URL = '/api/v1/titles/?pagination=cursor'
+
+    def test_01_titles_cursor(self, client, admin_client):
+        from reviews.models import Category, Title
+        titles, _, _ = create_titles(admin_client)
+        category = Category.objects.get(slug=titles[0]['category'])
+        for idx in range(12):
+            Title.objects.create(
+                name='Повтор', year=2000 + idx, category=category
+            )
+
+        results = collect_cursor_pages(client, self.TITLES_CURSOR_URL)
+        expected = list(
+            Title.objects.order_by('name', 'id').values_list('id', flat=True)
+        )
+        assert [title['id'] for title in results] == expected, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'упорядочивает произведения по `(name, id)` без пропусков '
+            'и повторов.'
+        )
+
+        results = collect_cursor_pages(
+            client,
+            f'{self.TITLES_CURSOR_URL}&category={category.slug}&year=2005'
+        )
+        assert [title['year'] for title in results] == [2005], (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'учитывает фильтры.'
+        )
+
+    def test_02_reviews_and_comments_cursor(self, client, admin_client,
+                                            admin):
+        from reviews.models import Comment, Review, Title, User
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        for idx in range(12):
+            Review.objects.create(
+                title=title, score=5, text=f'Отзыв {idx}',
+                author=User.objects.create(
+                    username=f'reviewer{idx}',
+                    email=f'reviewer{idx}@yamdb.fake'
+                ),
+            )
+        review = title.reviews.first()
+        for idx in range(12):
+            Comment.objects.create(
+                review=review, author=admin, text=f'Комментарий {idx}'
+            )
+
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        results = collect_cursor_pages(
+            client, f'{reviews_url}?pagination=cursor'
+        )
+        expected = list(title.reviews.order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+        assert [item['id'] for item in results] == expected, (
+            f'Проверьте, что курсорная пагинация `{reviews_url}` '
+            'упорядочивает отзывы по `(-pub_date, -id)` без пропусков '
+            'и повторов.'
+        )
+
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        results = collect_cursor_pages(
+            client, f'{comments_url}?pagination=cursor'
+        )
+        expected = list(review.comments.order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+        assert [item['id'] for item in results] == expected, (
+            f'Проверьте, что курсорная пагинация `{comments_url}` '
+            'упорядочивает комментарии по `(-pub_date, -id)` без пропусков '
+            'и повторов.'
+        )
+
+        response = client.get(reviews_url)
+        assert response.json()['count'] == 12, (
+            f'Проверьте, что без `?pagination=cursor` `{reviews_url}` '
+            'по-прежнему отдаёт постраничную пагинацию.'
+        )
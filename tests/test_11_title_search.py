@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`search` возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[1]['id']),
+            data={'description': 'Продолжение не про терминатора'}
+        )
+
+        assert self.search(client, 'терминатор') == [
+            titles[0]['name'], titles[1]['name']
+        ], (
+            f'Проверьте, что поиск `{self.TITLES_URL}?search=` находит '
+            'произведения по названию и описанию, а совпадения в '
+            'названии идут первыми.'
+        )
+        assert self.search(client, 'Yippie') == [], (
+            'Проверьте, что изменённое описание произведения '
+            'переиндексируется.'
+        )
+        assert self.search(client, 'орешек') == [titles[1]['name']], (
+            f'Проверьте, что поиск `{self.TITLES_URL}?search=` находит '
+            'произведения по отдельному слову названия.'
+        )
+        assert self.search(client, '"(*') == [], (
+            f'Проверьте, что поиск `{self.TITLES_URL}?search=` не падает '
+            'на служебных символах.'
+        )
+
+        admin_client.delete(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert self.search(client, 'терминатор') == [titles[1]['name']], (
+            'Проверьте, что удалённое произведение исключается из поиска.'
+        )
+
+    def test_02_rank_computed_in_one_pass(self, client, admin_client,
+                                          django_assert_num_queries):
+        from django.db import connection
+
+        if connection.vendor != 'sqlite':
+            pytest.skip('Форма запроса проверяется для индекса FTS5.')
+        create_titles(admin_client)
+        with django_assert_num_queries(3) as context:
+            self.search(client, 'терминатор')
+        search_sql = [
+            query['sql'] for query in context.captured_queries
+            if 'MATCH' in query['sql']
+        ]
+        assert search_sql and all(
+            sql.count('MATCH') == 1 and 'bm25' not in sql
+            and 'JOIN "reviews_title_fts"' in sql
+            for sql in search_sql
+        ), (
+            'Проверьте, что индекс FTS5 присоединяется к произведениям '
+            'один раз, а ранг берётся из того же прохода MATCH, без '
+            'коррелированного подзапроса на каждую строку.'
+        )
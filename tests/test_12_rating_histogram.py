@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12RatingHistogram:
+
+    HISTOGRAM_URL_TEMPLATE = '/api/v1/titles/{title_id}/rating-histogram/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_histogram(self, client, title_id):
+        response = client.get(
+            self.HISTOGRAM_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{self.HISTOGRAM_URL_TEMPLATE}` возвращает ответ со статусом '
+            '200.'
+        )
+        return response.json()
+
+    def test_01_histogram(self, client, admin_client, admin, user,
+                          user_client, django_assert_num_queries):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[1]['id']
+            ),
+            data={'score': 9}
+        )
+
+        with django_assert_num_queries(2):
+            data = self.get_histogram(client, titles[0]['id'])
+        expected = {str(score): 0 for score in range(1, 11)}
+        expected.update({'5': 1, '9': 1})
+        assert data['histogram'] == expected, (
+            f'Проверьте, что `{self.HISTOGRAM_URL_TEMPLATE}` возвращает '
+            'число отзывов для каждой оценки от 1 до 10.'
+        )
+        assert data['review_count'] == 2 and data['rating'] == 7, (
+            f'Проверьте, что `{self.HISTOGRAM_URL_TEMPLATE}` возвращает '
+            'число отзывов и средний рейтинг произведения.'
+        )
+        assert 5.5 < data['weighted_rating'] < 7, (
+            f'Проверьте, что `{self.HISTOGRAM_URL_TEMPLATE}` возвращает '
+            'взвешенный рейтинг, смещённый к середине шкалы.'
+        )
+
+        admin_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            )
+        )
+        data = self.get_histogram(client, titles[0]['id'])
+        assert data['histogram']['5'] == 0, (
+            'Проверьте, что при удалении отзыва уменьшается счётчик '
+            'его оценки.'
+        )
+
+    def test_02_recount_restores_histogram(self, client, admin_client,
+                                           admin):
+        from reviews.models import TitleScoreCount
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        TitleScoreCount.objects.all().delete()
+
+        call_command('recount_title_ratings')
+
+        data = self.get_histogram(client, titles[0]['id'])
+        assert len(data['histogram']) == 10 and data['histogram']['5'] == 1, (
+            'Проверьте, что команда `recount_title_ratings` '
+            'восстанавливает гистограмму оценок.'
+        )
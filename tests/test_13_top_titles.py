@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TopTitles:
+
+    TOP_URL = '/api/v1/titles/top/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def get_top(self, client, **params):
+        response = client.get(self.TOP_URL, params)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{self.TOP_URL}` возвращает ответ со статусом 200.'
+        )
+        return [title['id'] for title in response.json()]
+
+    def test_01_top_titles(self, client, admin_client, admin, user,
+                           user_client, moderator_client):
+        titles, categories, genres = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        create_single_review(admin_client, first, 'Хорошо', 8)
+        create_single_review(admin_client, second, 'Отлично', 9)
+
+        assert self.get_top(client) == [], (
+            f'Проверьте, что `{self.TOP_URL}` не включает произведения '
+            'с числом отзывов меньше порога.'
+        )
+        assert self.get_top(client, min_reviews=1) == [second, first], (
+            f'Проверьте, что `{self.TOP_URL}` сортирует произведения '
+            'по убыванию рейтинга.'
+        )
+        assert self.get_top(client, min_reviews=1, limit=1) == [second], (
+            f'Проверьте, что `{self.TOP_URL}` учитывает параметр `limit`.'
+        )
+        assert self.get_top(
+            client, min_reviews=1, genre=genres[0]['slug']
+        ) == [first], (
+            f'Проверьте, что `{self.TOP_URL}` фильтрует по жанру.'
+        )
+        assert self.get_top(
+            client, min_reviews=1, category=categories[1]['slug']
+        ) == [second], (
+            f'Проверьте, что `{self.TOP_URL}` фильтрует по категории.'
+        )
+
+        create_single_review(user_client, first, 'Шедевр', 10)
+        create_single_review(moderator_client, first, 'Шедевр', 10)
+        assert self.get_top(client, min_reviews=1) == [first, second], (
+            f'Проверьте, что `{self.TOP_URL}` обновляется при появлении '
+            'новых отзывов.'
+        )
+
+        admin_client.patch(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=second),
+            data={'genre': [genres[0]['slug']]}
+        )
+        assert self.get_top(
+            client, min_reviews=1, genre=genres[0]['slug']
+        ) == [first, second], (
+            f'Проверьте, что `{self.TOP_URL}` учитывает смену жанров '
+            'произведения.'
+        )
+
+        response = client.get(self.TOP_URL, {'limit': 1000})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{self.TOP_URL}` ограничивает параметр `limit`.'
+        )
+
+    def test_02_rebuild_is_atomic(self, admin_client, monkeypatch):
+        from django.db.models import QuerySet
+
+        from reviews.models import TitleRank
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        rows = TitleRank.objects.filter(title_id=title_id).count()
+
+        def fail(*args, **kwargs):
+            raise RuntimeError
+        monkeypatch.setattr(QuerySet, 'bulk_create', fail)
+        with pytest.raises(RuntimeError):
+            TitleRank.objects.rebuild_for_titles([title_id])
+        assert TitleRank.objects.filter(title_id=title_id).count() == rows, (
+            'Проверьте, что строки рейтинга удаляются и создаются заново '
+            'в одной транзакции.'
+        )
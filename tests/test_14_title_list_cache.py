@@ -0,0 +1,74 @@
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleListCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    GENRES_URL = '/api/v1/genres/'
+
+    def check_cache(self, client, admin_client, user_client,
+                    django_assert_num_queries):
+        titles, _, genres = create_titles(admin_client)
+        url = f'{self.TITLES_URL}?year=1984&genre={genres[0]["slug"]}'
+        first = client.get(url).json()
+        with django_assert_num_queries(0):
+            response = client.get(
+                f'{self.TITLES_URL}?genre={genres[0]["slug"]}&year=1984'
+            )
+        assert response.json() == first, (
+            f'Проверьте, что повторный GET-запрос к `{self.TITLES_URL}` '
+            'с теми же параметрами отдаётся из кеша.'
+        )
+
+        create_single_review(user_client, titles[0]['id'], 'Класс', 10)
+        data = client.get(url).json()
+        assert data['results'][0]['rating'] == 10, (
+            f'Проверьте, что кеш `{self.TITLES_URL}` сбрасывается при '
+            'появлении отзыва.'
+        )
+
+        admin_client.delete(f'{self.GENRES_URL}{genres[0]["slug"]}/')
+        assert client.get(url).json()['results'] == [], (
+            f'Проверьте, что кеш `{self.TITLES_URL}` сбрасывается при '
+            'удалении жанра.'
+        )
+
+    def test_01_locmem_cache(self, client, admin_client, user_client,
+                             django_assert_num_queries):
+        self.check_cache(
+            client, admin_client, user_client, django_assert_num_queries
+        )
+
+    def test_02_file_cache(self, client, admin_client, user_client,
+                           django_assert_num_queries, settings, tmp_path):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': str(tmp_path),
+            }
+        }
+        self.check_cache(
+            client, admin_client, user_client, django_assert_num_queries
+        )
+
+    def test_03_generation_changes_after_commit(self, admin_client, admin):
+        from django.db import transaction
+
+        from api.cache import TITLES_GENERATION_KEY, get_generation
+        from reviews.models import Review, Title
+        titles, _, _ = create_titles(admin_client)
+        generation = get_generation(TITLES_GENERATION_KEY)
+        with transaction.atomic():
+            Review.objects.create(
+                title=Title.objects.get(pk=titles[0]['id']), author=admin,
+                text='Класс', score=10)
+            # Другие соединения ещё видят данные до записи.
+            assert get_generation(TITLES_GENERATION_KEY) == generation, (
+                f'Проверьте, что поколение кеша `{self.TITLES_URL}` '
+                'меняется после фиксации транзакции, а не до неё.'
+            )
+        assert get_generation(TITLES_GENERATION_KEY) != generation
@@ -0,0 +1,111 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ConditionalGet:
+
+    def check_not_modified(self, client, url, django_assert_num_queries):
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert response.status_code == HTTPStatus.OK and etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `ETag`.'
+        )
+        assert response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `Last-Modified`.'
+        )
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304 без '
+            'обращения к базе данных.'
+        )
+        return etag
+
+    def test_01_read_endpoints(self, client, admin_client, admin, user,
+                               user_client, django_assert_num_queries):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            '/api/v1/genres/',
+            '/api/v1/categories/',
+            reviews_url,
+            f'{reviews_url}{review_id}/',
+            comments_url,
+            f'{comments_url}{comments[0]["id"]}/',
+        )
+        etags = {
+            url: self.check_not_modified(
+                client, url, django_assert_num_queries)
+            for url in urls
+        }
+
+        response = client.get(urls[0])
+        assert 'public' in response['Cache-Control'], (
+            'Проверьте, что ответы анонимным пользователям помечены '
+            '`Cache-Control: public`.'
+        )
+        assert 'Authorization' in response['Vary'], (
+            'Проверьте, что ответы содержат `Vary: Authorization`.'
+        )
+        response = user_client.get(urls[0])
+        assert 'private' in response['Cache-Control'], (
+            'Проверьте, что ответы авторизованным пользователям помечены '
+            '`Cache-Control: private`.'
+        )
+
+        create_single_comment(user_client, title_id, review_id, 'Согласен')
+        response = client.get(
+            comments_url, HTTP_IF_NONE_MATCH=etags[comments_url]
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что новый комментарий меняет `ETag` для '
+            f'`{comments_url}`.'
+        )
+        response = client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=etags[reviews_url]
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет `ETag` для '
+            f'`{reviews_url}`: отзывы отдают `comment_count`.'
+        )
+
+        user_client.patch(f'{reviews_url}{reviews[1]["id"]}/', {'score': 1})
+        for url in urls[:2] + urls[4:6]:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что изменение отзыва меняет `ETag` для `{url}`.'
+            )
+
+    def test_02_generation_expires(self, client, admin_client, settings,
+                                   django_assert_num_queries):
+        import time
+
+        from reviews.models import Category
+        settings.CACHE_GENERATION_TIMEOUT = 1
+        url = '/api/v1/categories/'
+        admin_client.post(url, data={'name': 'Фильм', 'slug': 'movie'})
+        etag = self.check_not_modified(
+            client, url, django_assert_num_queries)
+        # Запись в другом процессе не меняет поколение в кеше этого.
+        Category.objects.filter(slug='movie').update(name='Кино')
+        time.sleep(1.1)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что поколение ресурса в кеше истекает через '
+            'CACHE_GENERATION_TIMEOUT и условный GET не отвечает 304 '
+            'бесконечно.'
+        )
+        assert response.json()['results'][0]['name'] == 'Кино'
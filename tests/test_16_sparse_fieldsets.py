@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16SparseFieldsets:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_titles_fields(self, client, admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.TITLES_URL, {'fields': 'id,rating'})
+        results = response.json()['results']
+        assert all(set(title) == {'id', 'rating'} for title in results), (
+            f'Проверьте, что `{self.TITLES_URL}?fields=` возвращает только '
+            'перечисленные поля.'
+        )
+        assert len(queries) == 2, (
+            f'Проверьте, что `{self.TITLES_URL}?fields=` без `genre` не '
+            'загружает жанры отдельным запросом.'
+        )
+        assert 'description' not in queries[-1]['sql'], (
+            f'Проверьте, что `{self.TITLES_URL}?fields=` выбирает из базы '
+            'только нужные колонки.'
+        )
+        ratings = {title['id']: title['rating'] for title in results}
+        assert ratings[titles[0]['id']] == 5, (
+            f'Проверьте, что `{self.TITLES_URL}?fields=rating` возвращает '
+            'рейтинг произведения.'
+        )
+
+        response = client.get(
+            f'{self.TITLES_URL}{titles[0]["id"]}/',
+            {'omit': 'description,genre'}
+        )
+        assert set(response.json()) == {
+            'id', 'name', 'year', 'category', 'rating', 'review_count'
+        }, (
+            f'Проверьте, что `{self.TITLES_URL}<id>/?omit=` убирает '
+            'перечисленные поля из ответа.'
+        )
+
+    def test_02_reviews_fields(self, client, admin_client, admin):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        response = client.get(
+            f'{self.TITLES_URL}{titles[0]["id"]}/reviews/',
+            {'fields': 'id,score'}
+        )
+        assert response.json()['results'] == [
+            {'id': reviews[0]['id'], 'score': reviews[0]['score']}
+        ], (
+            'Проверьте, что параметр `fields` поддерживается и для '
+            'отзывов.'
+        )
@@ -0,0 +1,136 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitlesBulk:
+
+    BULK_URL = '/api/v1/titles/bulk/'
+    TITLES_URL = '/api/v1/titles/'
+
+    def make_items(self, count, genres, categories):
+        return [
+            {
+                'name': f'Произведение {idx}',
+                'year': 1900 + idx,
+                'genre': [genre['slug'] for genre in genres[:idx % 3 + 1]],
+                'category': categories[idx % 2]['slug'],
+            }
+            for idx in range(count)
+        ]
+
+    def post_bulk(self, client, items):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(self.BULK_URL, items, format='json')
+        return response, len(queries)
+
+    def test_01_bulk_create_and_update(self, admin_client, client):
+        from reviews.models import Title
+        titles, categories, genres = create_titles(admin_client)
+        items = self.make_items(2, genres, categories)
+        items.append({
+            'id': titles[0]['id'],
+            'name': 'Терминатор 2',
+            'year': 1991,
+            'genre': [genres[2]['slug']],
+            'category': categories[1]['slug'],
+        })
+        response, small_batch_queries = self.post_bulk(admin_client, items)
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{self.BULK_URL}` '
+            'с корректными данными возвращает ответ со статусом 201.'
+        )
+        assert [item['name'] for item in response.json()] == [
+            item['name'] for item in items
+        ], (
+            f'Проверьте, что ответ `{self.BULK_URL}` перечисляет '
+            'произведения в порядке запроса.'
+        )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert title.name == 'Терминатор 2' and [
+            genre.slug for genre in title.genre.all()
+        ] == [genres[2]['slug']], (
+            f'Проверьте, что `{self.BULK_URL}` обновляет произведения '
+            'с указанным `id` вместе с жанрами.'
+        )
+        response = client.get(self.TITLES_URL, {'search': 'Произведение'})
+        assert response.json()['count'] == 2, (
+            f'Проверьте, что произведения из `{self.BULK_URL}` попадают в '
+            'список и поисковый индекс.'
+        )
+
+        response, large_batch_queries = self.post_bulk(
+            admin_client, self.make_items(30, genres, categories)
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert large_batch_queries <= small_batch_queries, (
+            f'Проверьте, что число запросов `{self.BULK_URL}` не зависит '
+            'от размера пачки.'
+        )
+
+    def test_02_bulk_errors(self, admin_client, user_client):
+        from reviews.models import Title
+        titles, categories, genres = create_titles(admin_client)
+        items = self.make_items(3, genres, categories)
+        items[1]['genre'] = ['unknown']
+        items[2]['year'] = 'год'
+        response, _ = self.post_bulk(admin_client, items)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{self.BULK_URL}` возвращает 400, если '
+            'хотя бы одно произведение некорректно.'
+        )
+        errors = response.json()
+        assert (
+            errors[0] == {} and 'genre' in errors[1] and 'year' in errors[2]
+        ), (
+            f'Проверьте, что `{self.BULK_URL}` возвращает ошибки для '
+            'каждого элемента пачки.'
+        )
+        assert Title.objects.count() == len(titles), (
+            f'Проверьте, что `{self.BULK_URL}` не сохраняет пачку '
+            'с ошибками.'
+        )
+
+        response, _ = self.post_bulk(user_client, items[:1])
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{self.BULK_URL}` доступен только '
+            'администратору.'
+        )
+
+    def test_03_bulk_update_keeps_missing_fields(self, admin_client):
+        from reviews.models import Title
+        titles, categories, genres = create_titles(admin_client)
+        Title.objects.filter(pk=titles[0]['id']).update(
+            description='keep me')
+        Title.objects.filter(pk=titles[1]['id']).update(
+            description='old')
+        response, _ = self.post_bulk(admin_client, [
+            {
+                'id': titles[0]['id'],
+                'name': 'Терминатор 2',
+                'year': 1991,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            },
+            {
+                'id': titles[1]['id'],
+                'name': titles[1]['name'],
+                'year': titles[1]['year'],
+                'description': 'new',
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            },
+        ])
+        assert response.status_code == HTTPStatus.CREATED
+        assert Title.objects.get(pk=titles[0]['id']).description == (
+            'keep me'
+        ), (
+            f'Проверьте, что `{self.BULK_URL}` не затирает поля, которых '
+            'нет в элементе обновления.'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).description == 'new'
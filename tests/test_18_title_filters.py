@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18TitleFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get_names(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_filters(self, client, admin_client, user_client):
+        titles, _, genres = create_titles(admin_client)
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genres[0]['slug'], genres[2]['slug']],
+            'category': titles[0]['category'],
+        })
+        create_single_review(user_client, titles[0]['id'], 'Класс', 8)
+        create_single_review(user_client, titles[1]['id'], 'Неплохо', 6)
+
+        assert self.get_names(client, year_min=1980, year_max=1985) == [
+            titles[0]['name']
+        ], (
+            f'Проверьте, что `{self.TITLES_URL}` фильтрует по `year_min` и '
+            '`year_max`.'
+        )
+        genre_slugs = f'{genres[0]["slug"]},{genres[2]["slug"]}'
+        assert self.get_names(client, genre=genre_slugs) == sorted(
+            [titles[0]['name'], titles[1]['name'], 'Чужой']
+        ), (
+            f'Проверьте, что `{self.TITLES_URL}?genre=a,b` возвращает '
+            'произведения с любым из жанров без повторов.'
+        )
+        assert self.get_names(
+            client, genre=genre_slugs, genre_match='all'
+        ) == ['Чужой'], (
+            f'Проверьте, что `{self.TITLES_URL}?genre=a,b&genre_match=all` '
+            'возвращает произведения со всеми жанрами.'
+        )
+        assert self.get_names(client, rating_min=7.5) == [
+            titles[0]['name']
+        ], (
+            f'Проверьте, что `{self.TITLES_URL}` фильтрует по `rating_min`.'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='План запроса SQLite'
+    )
+    def test_02_filters_use_indexes(self):
+        from django.http import QueryDict
+
+        from api.filters import TitleFilter
+        from reviews.models import Title
+
+        for query, index in (
+            ('category=films&year_min=1980', 'title_category_year_idx'),
+            ('genre=horror,drama', 'genre_title_genre_idx'),
+            ('genre=horror,drama&genre_match=all', 'genre_title_genre_idx'),
+        ):
+            plan = TitleFilter(
+                QueryDict(query), queryset=Title.objects.all()
+            ).qs.explain()
+            assert index in plan, (
+                f'Проверьте, что фильтр `{query}` использует индекс '
+                f'`{index}`. План запроса:\n{plan}'
+            )
+            assert 'SCAN reviews_title' not in plan, (
+                f'Проверьте, что фильтр `{query}` не сканирует таблицу '
+                f'произведений. План запроса:\n{plan}'
+            )
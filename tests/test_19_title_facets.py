@@ -0,0 +1,52 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19TitleFacets:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_facets(self, client, admin_client,
+                       django_assert_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genres[0]['slug'], genres[2]['slug']],
+            'category': categories[0]['slug'],
+        })
+
+        with django_assert_num_queries(6):
+            response = client.get(
+                self.TITLES_URL, {'facets': 'genre,category,year'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['facets'] == {
+            'genre': {
+                genres[0]['slug']: 2,
+                genres[1]['slug']: 1,
+                genres[2]['slug']: 2,
+            },
+            'category': {categories[0]['slug']: 2, categories[1]['slug']: 1},
+            'year': {'1970': 1, '1980': 2},
+        }, (
+            f'Проверьте, что `{self.TITLES_URL}?facets=` возвращает число '
+            'произведений по жанрам, категориям и десятилетиям.'
+        )
+        assert len(data['results']) == 3
+
+        response = client.get(self.TITLES_URL, {
+            'facets': 'genre,year', 'category': categories[0]['slug']
+        })
+        assert response.json()['facets'] == {
+            'genre': {genres[0]['slug']: 2, genres[1]['slug']: 1,
+                      genres[2]['slug']: 1},
+            'year': {'1970': 1, '1980': 1},
+        }, (
+            f'Проверьте, что фасеты `{self.TITLES_URL}` учитывают фильтры.'
+        )
@@ -0,0 +1,101 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20TitleBitmapIndex:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    @pytest.fixture(autouse=True)
+    def bitmap_index(self, settings):
+        from api.bitmaps import title_bitmaps
+        settings.TITLE_BITMAP_INDEX = True
+        title_bitmaps.reset()
+        yield title_bitmaps
+        title_bitmaps.reset()
+
+    def get_names(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_filters(self, client, admin_client, bitmap_index):
+        titles, categories, genres = create_titles(admin_client)
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genres[0]['slug'], genres[2]['slug']],
+            'category': categories[0]['slug'],
+        })
+
+        genre_slugs = f'{genres[0]["slug"]},{genres[2]["slug"]}'
+        assert self.get_names(client, genre=genre_slugs) == sorted(
+            [titles[0]['name'], titles[1]['name'], 'Чужой']
+        ), (
+            'Проверьте, что битовый индекс объединяет жанры по `OR`.'
+        )
+        assert bitmap_index.built
+        assert self.get_names(
+            client, genre=genre_slugs, genre_match='all'
+        ) == ['Чужой'], (
+            'Проверьте, что при `genre_match=all` битовый индекс '
+            'пересекает жанры.'
+        )
+        assert self.get_names(
+            client, category=categories[0]['slug'], year_min=1980
+        ) == [titles[0]['name']], (
+            'Проверьте, что битовый индекс фильтрует по категории и годам.'
+        )
+        assert self.get_names(
+            client, genre=genres[0]['slug'], name='Чужой'
+        ) == ['Чужой'], (
+            'Проверьте, что фильтры вне индекса применяются к выборке '
+            'индекса.'
+        )
+
+    def test_02_index_follows_writes(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        assert self.get_names(client, genre=genres[2]['slug']) == [
+            titles[1]['name']
+        ]
+
+        admin_client.patch(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            data={'genre': [genres[2]['slug']],
+                  'category': categories[1]['slug']}
+        )
+        assert self.get_names(client, genre=genres[2]['slug']) == sorted(
+            [titles[0]['name'], titles[1]['name']]
+        ), (
+            'Проверьте, что битовый индекс обновляется при изменении '
+            'жанров произведения.'
+        )
+        assert self.get_names(client, category=categories[0]['slug']) == [], (
+            'Проверьте, что битовый индекс обновляется при изменении '
+            'категории произведения.'
+        )
+
+        admin_client.delete(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[1]['id'])
+        )
+        assert self.get_names(client, genre=genres[2]['slug']) == [
+            titles[0]['name']
+        ], (
+            'Проверьте, что удалённое произведение исключается из индекса.'
+        )
+
+    def test_03_benchmark_command(self, admin_client):
+        create_titles(admin_client)
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'benchmark_title_filters', repeat=1, stdout=stdout, stderr=stderr
+        )
+        assert 'индекс' in stdout.getvalue()
+        assert stderr.getvalue() == '', (
+            'Проверьте, что результаты SQL и битового индекса совпадают.'
+        )
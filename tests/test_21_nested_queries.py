@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+NESTED_LIST_QUERIES = 3
+NESTED_DETAIL_QUERIES = 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21NestedQueries:
+
+    def add_reviews(self, title_id, count):
+        from reviews.models import Comment, Review, User
+        reviews = []
+        start = User.objects.count()
+        for idx in range(start, start + count):
+            author = User.objects.create(
+                username=f'nested{idx}', email=f'nested{idx}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                title_id=title_id, author=author, score=7, text='Отзыв'
+            )
+            Comment.objects.create(
+                review=review, author=author, text='Комментарий'
+            )
+            reviews.append(review)
+        return reviews
+
+    def test_01_reviews_queries(self, client, admin_client,
+                                django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = self.add_reviews(title_id, 2)[0]
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        with django_assert_num_queries(NESTED_LIST_QUERIES):
+            client.get(url)
+
+        self.add_reviews(titles[1]['id'], 8)
+        self.add_reviews(title_id, 6)
+        with django_assert_num_queries(NESTED_LIST_QUERIES):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['results']) == 8, (
+            'Проверьте, что список отзывов загружается фиксированным '
+            'числом запросов вместе с авторами.'
+        )
+        with django_assert_num_queries(NESTED_DETAIL_QUERIES):
+            response = client.get(f'{url}{review.pk}/')
+        assert response.json()['author'] == review.author.username
+
+    def test_02_comments_queries(self, client, admin_client,
+                                 django_assert_num_queries):
+        from reviews.models import Comment, User
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = self.add_reviews(title_id, 1)[0]
+        url = f'/api/v1/titles/{title_id}/reviews/{review.pk}/comments/'
+        for idx in range(7):
+            Comment.objects.create(
+                review=review, text='Комментарий',
+                author=User.objects.create(
+                    username=f'commenter{idx}',
+                    email=f'commenter{idx}@yamdb.fake'
+                ),
+            )
+        with django_assert_num_queries(NESTED_LIST_QUERIES):
+            response = client.get(url)
+        assert len(response.json()['results']) == 8, (
+            'Проверьте, что список комментариев загружается фиксированным '
+            'числом запросов вместе с авторами.'
+        )
+        comment = review.comments.first()
+        with django_assert_num_queries(NESTED_DETAIL_QUERIES):
+            client.get(f'{url}{comment.pk}/')
+
+        response = client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{review.pk}/comments/'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии отзыва недоступны по адресу '
+            'другого произведения.'
+        )
@@ -0,0 +1,82 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from tests.utils import create_titles
+
+CONCURRENT_SUBMITS = 4
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22DuplicateReviews:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_duplicate_review(self, admin_client, user_client):
+        from reviews.models import Review
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        data = {'text': 'Отзыв', 'score': 7}
+        response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+
+        response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв пользователя на произведение '
+            'возвращает ответ со статусом 400.'
+        )
+        assert 'detail' in response.json()
+        assert Review.objects.count() == 1
+
+        response = user_client.post(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[1]['id']),
+            data=data
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что пользователь может оставить отзывы на разные '
+            'произведения.'
+        )
+
+    def test_02_concurrent_submits(self, admin_client, token_user):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            pytest.skip('SQLite в памяти не допускает параллельной записи')
+        from reviews.models import Review, Title
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        barrier = threading.Barrier(CONCURRENT_SUBMITS)
+        statuses = []
+
+        def submit():
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}')
+            barrier.wait()
+            try:
+                response = client.post(url, data={'text': 'Гонка', 'score': 9})
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=submit) for _ in range(CONCURRENT_SUBMITS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(statuses) == [HTTPStatus.CREATED] + [
+            HTTPStatus.BAD_REQUEST
+        ] * (CONCURRENT_SUBMITS - 1), (
+            'Проверьте, что при одновременной отправке одного отзыва '
+            'создаётся ровно один отзыв, а остальные запросы получают 400.'
+        )
+        assert Review.objects.filter(title_id=titles[0]['id']).count() == 1
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (9, 1), (
+            'Проверьте, что отклонённые повторные отзывы не меняют '
+            'счётчики произведения.'
+        )
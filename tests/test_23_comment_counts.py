@@ -0,0 +1,165 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23CommentCounts:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def get_comment_count(self, review_id):
+        from reviews.models import Review
+        return Review.objects.get(pk=review_id).comment_count
+
+    def test_01_counters_follow_comments(self, admin_client, admin, user,
+                                         user_client, moderator,
+                                         moderator_client):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+        })
+        review_id = reviews[0]['id']
+        assert self.get_comment_count(review_id) == 3, (
+            'Проверьте, что при создании комментария увеличивается '
+            'счётчик комментариев отзыва.'
+        )
+
+        response = user_client.patch(
+            f'{self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]["id"])}'
+            f'{reviews[1]["id"]}/',
+            data={'text': 'Исправленный отзыв'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = admin_client.patch(
+            f'{self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]["id"])}'
+            f'{review_id}/',
+            data={'text': 'Исправленный отзыв'}
+        )
+        assert response.json()['comment_count'] == 3, (
+            'Проверьте, что редактирование отзыва не перезаписывает '
+            'счётчик комментариев.'
+        )
+
+        from reviews.models import Comment, Review
+        review = Review.objects.get(pk=review_id)
+        Comment.objects.create(review=review, author=user, text='Гонка')
+        review.text = 'Отзыв из устаревшего объекта'
+        review.save()
+        assert self.get_comment_count(review_id) == 4, (
+            'Проверьте, что сохранение загруженного ранее отзыва не '
+            'затирает параллельно изменённый счётчик комментариев.'
+        )
+        Comment.objects.filter(text='Гонка').delete()
+
+        admin_client.delete(
+            f'{self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]["id"])}'
+            f'{review_id}/comments/{comments[0]["id"]}/'
+        )
+        assert self.get_comment_count(review_id) == 2, (
+            'Проверьте, что при удалении комментария уменьшается '
+            'счётчик комментариев отзыва.'
+        )
+        create_single_comment(
+            moderator_client, titles[0]['id'], reviews[1]['id'], 'Ответ'
+        )
+        moderator.delete()
+        assert self.get_comment_count(review_id) == 1, (
+            'Проверьте, что при каскадном удалении комментариев '
+            'уменьшаются счётчики отзывов.'
+        )
+        assert self.get_comment_count(reviews[1]['id']) == 0
+
+    def test_02_counters_in_api(self, client, admin_client, admin, user,
+                                user_client):
+        from reviews.models import Review, Title
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        response = client.get(url, {'ordering': '-comment_count'})
+        assert [
+            (review['id'], review['comment_count'])
+            for review in response.json()['results']
+        ] == [(reviews[0]['id'], 2), (reviews[1]['id'], 0)], (
+            f'Проверьте, что `{url}` отдаёт поле `comment_count` и '
+            'сортирует по нему.'
+        )
+
+        response = client.get(self.TITLES_URL, {'ordering': '-review_count'})
+        assert [
+            (title['id'], title['review_count'])
+            for title in response.json()['results']
+        ] == [(titles[0]['id'], 2), (titles[1]['id'], 0)], (
+            f'Проверьте, что `{self.TITLES_URL}` отдаёт поле '
+            '`review_count` и сортирует по нему.'
+        )
+
+        Review.objects.update(comment_count=100)
+        Title.objects.update(review_count=100)
+        call_command('recount_title_ratings')
+        assert self.get_comment_count(reviews[0]['id']) == 2, (
+            'Проверьте, что команда `recount_title_ratings` восстанавливает '
+            'счётчики комментариев отзывов.'
+        )
+
+    def test_03_cascade_deletes_do_not_query_per_comment(
+        self, django_user_model
+    ):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Comment, Review, Title
+        author = django_user_model.objects.create(
+            username='cascade_author', email='cascade_author@yamdb.fake')
+        commenters = [
+            django_user_model.objects.create(
+                username=f'cascade_{number}',
+                email=f'cascade_{number}@yamdb.fake')
+            for number in range(2)
+        ]
+
+        def make_review(comment_count):
+            title = Title.objects.create(name='Произведение', year=2000)
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5)
+            for number in range(comment_count):
+                Comment.objects.create(
+                    review=review, author=commenters[number % 2],
+                    text='Комментарий')
+            return review
+
+        def count_queries(delete):
+            with CaptureQueriesContext(connection) as context:
+                delete()
+            lookups = [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].startswith(
+                    'SELECT "reviews_review"."title_id"')
+            ]
+            assert lookups == [], (
+                'Проверьте, что каскадное удаление комментариев не читает '
+                'отзыв каждого комментария отдельным запросом.'
+            )
+            return len(context.captured_queries)
+
+        for model in ('review', 'title'):
+            counts = []
+            for comment_count in (1, 4):
+                review = make_review(comment_count)
+                target = review if model == 'review' else review.title
+                counts.append(count_queries(target.delete))
+            assert counts[0] == counts[1], (
+                f'Проверьте, что число запросов при удалении {model} не '
+                'зависит от числа комментариев.'
+            )
+        make_review(4)
+        count_queries(commenters[0].delete)
+        count_queries(author.delete)
+        assert not Comment.objects.exists()
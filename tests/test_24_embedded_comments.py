@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_comment, create_titles
+
+EMBEDDED_LIST_QUERIES = 4
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24EmbeddedComments:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def add_reviews(self, title_id, count, comments):
+        from reviews.models import Comment, Review, User
+        for idx in range(count):
+            author = User.objects.create(
+                username=f'embed{idx}', email=f'embed{idx}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                title_id=title_id, author=author, score=6, text='Отзыв'
+            )
+            for number in range(comments):
+                Comment.objects.create(
+                    review=review, author=author, text=f'Комментарий {number}'
+                )
+
+    def test_01_embed_comments(self, client, admin_client,
+                               django_assert_num_queries):
+        from reviews.models import Review
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        self.add_reviews(titles[0]['id'], 6, 4)
+
+        with django_assert_num_queries(EMBEDDED_LIST_QUERIES):
+            response = client.get(url, {'embed_comments': 3})
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert len(results) == 6
+        for item in results:
+            expected = list(Review.objects.get(pk=item['id']).comments.order_by(
+                '-pub_date', '-id').values_list('id', flat=True)[:3])
+            assert [
+                comment['id'] for comment in item['comments']
+            ] == expected, (
+                f'Проверьте, что `{url}?embed_comments=3` возвращает три '
+                'последних комментария каждого отзыва.'
+            )
+        assert set(results[0]['comments'][0]) == {
+            'id', 'text', 'author', 'pub_date'
+        }
+
+        response = client.get(url)
+        assert 'comments' not in response.json()['results'][0], (
+            f'Проверьте, что без `embed_comments` `{url}` не отдаёт '
+            'комментарии.'
+        )
+        response = client.get(url, {'embed_comments': 100})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{url}` ограничивает `embed_comments`.'
+        )
+
+    def test_02_embedded_comments_etag(self, client, admin_client,
+                                       user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        self.add_reviews(titles[0]['id'], 1, 1)
+        response = client.get(url, {'embed_comments': 1})
+        etag = response['ETag']
+        review = response.json()['results'][0]
+
+        create_single_comment(user_client, titles[0]['id'], review['id'],
+                              'Новый комментарий')
+        response = client.get(
+            url, {'embed_comments': 1}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет ETag списка отзывов.'
+        )
+        assert response.json()['results'][0]['comments'][0]['text'] == (
+            'Новый комментарий'
+        )
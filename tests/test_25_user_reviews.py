@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.test_10_cursor_pagination import collect_cursor_pages
+from tests.utils import create_titles
+
+USER_REVIEWS_QUERIES = 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25UserReviews:
+
+    USERS_URL = '/api/v1/users/'
+    USER_REVIEWS_ME_URL = '/api/v1/users/me/reviews/'
+
+    def add_reviews(self, admin_client, author, count):
+        from reviews.models import Category, Review, Title
+        titles, _, _ = create_titles(admin_client)
+        category = Category.objects.get(slug=titles[0]['category'])
+        for idx in range(count):
+            title = Title.objects.create(
+                name=f'Фильм {idx}', year=2000, category=category
+            )
+            Review.objects.create(
+                title=title, author=author, score=7, text=f'Отзыв {idx}'
+            )
+        Review.objects.create(
+            title_id=titles[0]['id'], author=author, score=3, text='Последний'
+        )
+        return list(author.reviews.order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+
+    def test_01_my_reviews(self, client, admin_client, user, user_client,
+                           django_assert_num_queries):
+        expected = self.add_reviews(admin_client, user, 12)
+        response = client.get(self.USER_REVIEWS_ME_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что `{self.USER_REVIEWS_ME_URL}` недоступен без '
+            'токена.'
+        )
+
+        with django_assert_num_queries(USER_REVIEWS_QUERIES):
+            response = user_client.get(self.USER_REVIEWS_ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        review = response.json()['results'][0]
+        assert review['title']['name'] == 'Терминатор', (
+            f'Проверьте, что `{self.USER_REVIEWS_ME_URL}` отдаёт название '
+            'произведения вместе с отзывом.'
+        )
+        results = collect_cursor_pages(user_client, self.USER_REVIEWS_ME_URL)
+        assert [item['id'] for item in results] == expected, (
+            f'Проверьте, что `{self.USER_REVIEWS_ME_URL}` отдаёт все отзывы '
+            'пользователя от новых к старым.'
+        )
+
+    def test_02_user_reviews(self, client, admin_client, admin, user,
+                             django_assert_num_queries):
+        expected = self.add_reviews(admin_client, user, 3)
+        url = f'{self.USERS_URL}{user.username}/reviews/'
+        with django_assert_num_queries(USER_REVIEWS_QUERIES):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert [
+            item['id'] for item in response.json()['results']
+        ] == expected, (
+            f'Проверьте, что `{url}` отдаёт отзывы пользователя.'
+        )
+        response = client.get(f'{self.USERS_URL}{admin.username}/reviews/')
+        assert response.json()['results'] == []
+        response = client.get(f'{self.USERS_URL}nobody/reviews/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26CachedJwtAuth:
+
+    CATEGORIES_URL = '/api/v1/categories/'
+    USERS_URL = '/api/v1/users/'
+    USERS_ME_URL = '/api/v1/users/me/'
+    USER_REVIEWS_ME_URL = '/api/v1/users/me/reviews/'
+
+    def get_client(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_01_token_claims_skip_database(self, user,
+                                           django_assert_num_queries):
+        from django.core.cache import cache
+
+        from api.authentication import get_access_token
+        # Новый процесс: поколения пользователя в кеше ещё нет.
+        cache.clear()
+        client = self.get_client(get_access_token(user))
+        with django_assert_num_queries(1):
+            response = client.get(self.USER_REVIEWS_ME_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что пользователь из полей токена проходит '
+            'аутентификацию без запроса к таблице пользователей.'
+        )
+        response = client.get(self.USERS_ME_URL)
+        assert response.json()['email'] == user.email, (
+            f'Проверьте, что `{self.USERS_ME_URL}` догружает поля '
+            'пользователя, которых нет в токене.'
+        )
+
+    def test_02_cached_user_lookup(self, user_client,
+                                   django_assert_num_queries):
+        with django_assert_num_queries(2):
+            user_client.get(self.USER_REVIEWS_ME_URL)
+        with django_assert_num_queries(1):
+            response = user_client.get(self.USER_REVIEWS_ME_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что повторный запрос с тем же токеном не загружает '
+            'пользователя из базы.'
+        )
+
+    def test_03_role_change_invalidates_cache(self, admin_client, user):
+        from api.authentication import get_access_token
+        client = self.get_client(get_access_token(user))
+        data = {'name': 'Сериалы', 'slug': 'series'}
+        response = client.post(self.CATEGORIES_URL, data=data)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        response = client.post(self.CATEGORIES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что повышение роли действует сразу, несмотря на '
+            'роль в полях токена.'
+        )
+
+        admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'user'}
+        )
+        response = client.delete(f'{self.CATEGORIES_URL}series/')
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что понижение роли сбрасывает закешированного '
+            'пользователя.'
+        )
+
+        user.is_active = False
+        user.save()
+        response = client.get(self.USER_REVIEWS_ME_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что неактивный пользователь не проходит '
+            'аутентификацию.'
+        )
+
+    def test_04_changes_outside_signals(self, user_client, user, settings,
+                                        monkeypatch):
+        import time
+
+        from django.core.cache import cache
+
+        from api.authentication import CachedJWTAuthentication
+        from api.cache import user_generation_key
+        from reviews.models import User
+        data = {'name': 'Сериалы', 'slug': 'series'}
+        assert user_client.post(
+            self.CATEGORIES_URL, data=data
+        ).status_code == HTTPStatus.FORBIDDEN
+
+        # Поколение сменил другой процесс через общий кеш.
+        User.objects.filter(pk=user.pk).update(role='admin')
+        cache.set(user_generation_key(user.pk), time.time_ns())
+        assert user_client.post(
+            self.CATEGORIES_URL, data=data
+        ).status_code == HTTPStatus.CREATED, (
+            'Проверьте, что смена поколения пользователя в кеше сразу '
+            'сбрасывает его закешированные поля.'
+        )
+
+        # Поколение не менялось: update() не отправляет сигналов,
+        # а кеш процесса мог не увидеть изменение.
+        User.objects.filter(pk=user.pk).update(role='user')
+        later = time.time() + settings.JWT_AUTH_CACHE_TTL + 1
+        monkeypatch.setattr(
+            CachedJWTAuthentication, 'timer', lambda self: later)
+        response = user_client.delete(f'{self.CATEGORIES_URL}series/')
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что закешированные поля пользователя живут не '
+            'дольше JWT_AUTH_CACHE_TTL.'
+        )
@@ -0,0 +1,69 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+
+# Два счётчика ограничения частоты, поиск пользователей, BEGIN,
+# INSERT пользователя, его строки в поисковом индексе и письма, COMMIT.
+SIGNUP_NEW_USER_QUERIES = 8
+SIGNUP_EXISTING_USER_QUERIES = 6
+SIGNUP_CONFLICT_QUERIES = 3
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27SignupQueries:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def test_01_signup_queries(self, client, django_assert_num_queries,
+                               monkeypatch, settings):
+        from api import outbox
+        settings.THROTTLE_PURGE_PROBABILITY = 0
+        # Считаются только запросы самой регистрации, без отправки.
+        monkeypatch.setattr(outbox, 'deliver_soon', lambda email_ids: None)
+        data = {'email': 'fast@yamdb.fake', 'username': 'fast_user'}
+        with django_assert_num_queries(SIGNUP_NEW_USER_QUERIES):
+            response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.OK
+        with django_assert_num_queries(SIGNUP_EXISTING_USER_QUERIES):
+            response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что повторная регистрация существующего '
+            'пользователя не создаёт его заново.'
+        )
+        assert mail.outbox == []
+
+        with django_assert_num_queries(SIGNUP_CONFLICT_QUERIES):
+            response = client.post(self.URL_SIGNUP, data={
+                'email': 'other@yamdb.fake', 'username': 'fast_user'
+            })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что конфликт имени пользователя определяется '
+            'одним запросом после проверки частоты.'
+        )
+
+    def test_02_signup_does_not_wait_for_mail(self, client, settings,
+                                              monkeypatch):
+        from api import outbox
+        settings.EMAIL_SEND_ASYNC = True
+        release = threading.Event()
+        sent = threading.Event()
+
+        def slow_deliver_pending(*args, **kwargs):
+            release.wait(timeout=5)
+            sent.set()
+
+        monkeypatch.setattr(outbox, 'deliver_pending', slow_deliver_pending)
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'async@yamdb.fake', 'username': 'async_user'
+        })
+        assert response.status_code == HTTPStatus.OK
+        assert not sent.is_set(), (
+            'Проверьте, что ответ на регистрацию не ждёт отправки письма.'
+        )
+        release.set()
+        assert sent.wait(timeout=5), (
+            'Проверьте, что письмо с кодом подтверждения отправляется '
+            'в фоне.'
+        )
@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+
+class FailingBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('SMTP недоступен')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28Outbox:
+
+    FAILING_BACKEND = 'tests.test_28_outbox.FailingBackend'
+    FILE_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+
+    @pytest.fixture(autouse=True)
+    def circuit_breaker(self):
+        from api.outbox import circuit_breaker
+        circuit_breaker.reset()
+        yield circuit_breaker
+        circuit_breaker.reset()
+
+    def add_emails(self, count):
+        from reviews.models import OutboxEmail
+        OutboxEmail.objects.bulk_create(
+            OutboxEmail(
+                subject='Уведомление', body=f'Письмо {idx}',
+                recipients=[f'user{idx}@yamdb.fake'],
+            )
+            for idx in range(count)
+        )
+
+    def run_worker(self, **options):
+        call_command('run_outbox_worker', once=True, **options)
+
+    def test_01_email_follows_transaction(self, client):
+        from api.outbox import queue_email
+        from reviews.models import OutboxEmail
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                queue_email('Тема', 'Текст', ['rollback@yamdb.fake'])
+                raise RuntimeError
+        assert not OutboxEmail.objects.exists() and mail.outbox == [], (
+            'Проверьте, что письмо из откаченной транзакции не попадает '
+            'в очередь и не отправляется.'
+        )
+
+        client.post('/api/v1/auth/signup/', data={
+            'email': 'outbox@yamdb.fake', 'username': 'outbox_user'
+        })
+        email = OutboxEmail.objects.get()
+        assert email.recipients == ['outbox@yamdb.fake']
+        assert email.sent_at is not None, (
+            'Проверьте, что код подтверждения уходит через очередь писем.'
+        )
+
+    def test_02_worker_batches(self, settings, tmp_path):
+        from reviews.models import OutboxEmail
+        settings.EMAIL_BACKEND = self.FILE_BACKEND
+        settings.EMAIL_FILE_PATH = tmp_path
+        self.add_emails(5)
+
+        self.run_worker(batch_size=2, workers=2)
+
+        assert not OutboxEmail.objects.filter(sent_at=None).exists(), (
+            'Проверьте, что `run_outbox_worker` отправляет все письма '
+            'из очереди.'
+        )
+        assert len(list(tmp_path.iterdir())) == 3, (
+            'Проверьте, что `run_outbox_worker` открывает одно соединение '
+            'с почтовым бэкендом на пачку писем.'
+        )
+        self.run_worker()
+        assert len(list(tmp_path.iterdir())) == 3, (
+            'Проверьте, что отправленные письма не отправляются повторно.'
+        )
+
+    def test_03_retries_and_circuit_breaker(self, settings, circuit_breaker):
+        from reviews.models import OutboxEmail
+        settings.EMAIL_BACKEND = self.FAILING_BACKEND
+        self.add_emails(2)
+
+        started = timezone.now()
+        self.run_worker()
+        email = OutboxEmail.objects.first()
+        assert email.attempts == 1 and 'SMTP' in email.last_error, (
+            'Проверьте, что неудачная отправка записывает попытку и ошибку.'
+        )
+        assert email.next_attempt_at >= started + timedelta(
+            seconds=settings.OUTBOX_RETRY_DELAY
+        ), (
+            'Проверьте, что повторная отправка откладывается.'
+        )
+
+        for _ in range(settings.OUTBOX_CIRCUIT_FAILURES):
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            self.run_worker()
+        attempts = OutboxEmail.objects.first().attempts
+        assert attempts == settings.OUTBOX_CIRCUIT_FAILURES, (
+            'Проверьте, что после серии отказов срабатывает '
+            'предохранитель и отправка приостанавливается.'
+        )
+        assert circuit_breaker.is_open
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        circuit_breaker.reset_timeout = 0
+        self.run_worker()
+        assert len(mail.outbox) == 2, (
+            'Проверьте, что после паузы предохранителя письма '
+            'доставляются.'
+        )
+        assert not circuit_breaker.is_open
+        circuit_breaker.reset_timeout = settings.OUTBOX_CIRCUIT_RESET
+
+    def test_04_gives_up_after_max_attempts(self, settings):
+        from reviews.models import OutboxEmail
+        settings.EMAIL_BACKEND = self.FAILING_BACKEND
+        settings.OUTBOX_MAX_ATTEMPTS = 1
+        self.add_emails(1)
+        self.run_worker()
+        email = OutboxEmail.objects.get()
+        assert email.failed_at is not None, (
+            'Проверьте, что после исчерпания попыток письмо помечается '
+            'неотправленным и больше не берётся в работу.'
+        )
@@ -0,0 +1,162 @@
+from http import HTTPStatus
+
+import pytest
+
+RATES = {'auth': '3/min', 'auth_username': '2/min', 'writes': '2/min'}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29Throttling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+    URL_REVIEWS = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture(autouse=True)
+    def rates(self, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES,
+        }
+        # Очистка счётчиков добавляет запрос, число которых проверяется.
+        settings.THROTTLE_PURGE_PROBABILITY = 0
+
+    def test_01_token_guessing_is_limited(self, client, user,
+                                          django_assert_num_queries):
+        data = {'username': user.username, 'confirmation_code': 'wrong'}
+        for _ in range(2):
+            response = client.post(self.URL_TOKEN, data=data)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что `{self.URL_TOKEN}` ограничивает число '
+            'попыток подобрать код для одного username.'
+        )
+        assert int(response.headers['Retry-After']) > 0
+        with django_assert_num_queries(1):
+            response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что повторный запрос с заблокированным username '
+            'отклоняется без обращения к его счётчику и к пользователям.'
+        )
+
+    def test_02_auth_is_limited_per_ip(self, client):
+        for number in range(3):
+            response = client.post(self.URL_SIGNUP, data={
+                'username': f'user_{number}',
+                'email': f'user_{number}@yamdb.fake',
+            })
+            assert response.status_code == HTTPStatus.OK
+        response = client.post(self.URL_TOKEN, data={
+            'username': 'user_0', 'confirmation_code': 'wrong',
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что регистрация и получение токена ограничены '
+            'общим лимитом запросов с одного IP.'
+        )
+
+    def test_02_01_forwarded_for_is_not_trusted(self, client, settings):
+        for number in range(3):
+            response = client.post(self.URL_SIGNUP, data={
+                'username': f'user_{number}',
+                'email': f'user_{number}@yamdb.fake',
+            }, HTTP_X_FORWARDED_FOR=f'10.0.0.{number}')
+            assert response.status_code == HTTPStatus.OK
+        response = client.post(self.URL_SIGNUP, data={
+            'username': 'user_3', 'email': 'user_3@yamdb.fake',
+        }, HTTP_X_FORWARDED_FOR='10.0.0.3')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что без доверенных прокси лимит по IP не обходится '
+            'подменой заголовка X-Forwarded-For.'
+        )
+
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        response = client.post(self.URL_SIGNUP, data={
+            'username': 'user_4', 'email': 'user_4@yamdb.fake',
+        }, HTTP_X_FORWARDED_FOR='10.0.0.4')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что за доверенным прокси IP клиента берётся из '
+            'X-Forwarded-For.'
+        )
+
+    def test_03_review_posts_are_limited_per_user(self, user_client,
+                                                  admin_client):
+        from reviews.models import Title
+        titles = [
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+            for number in range(3)
+        ]
+        for title in titles[:2]:
+            response = user_client.post(
+                self.URL_REVIEWS.format(title_id=title.pk),
+                data={'text': 'Отзыв', 'score': 5},
+            )
+            assert response.status_code == HTTPStatus.CREATED
+        url = self.URL_REVIEWS.format(title_id=titles[2].pk)
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что создание отзывов ограничено для пользователя.'
+        )
+        assert user_client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что лимит записи не действует на чтение.'
+        )
+        response = admin_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что лимит считается для каждого пользователя '
+            'отдельно.'
+        )
+
+    @pytest.mark.parametrize('store', (
+        'api.throttling.DatabaseCounterStore',
+        'api.throttling.CacheCounterStore',
+    ))
+    def test_04_sliding_window(self, client, settings, monkeypatch, store):
+        from api import throttling
+        settings.THROTTLE_STORE = store
+        throttling.get_counter_store().clear()
+        start = 60 * 1000
+        data = {'username': 'sliding', 'confirmation_code': 'wrong'}
+
+        def post_at(moment):
+            monkeypatch.setattr(
+                throttling.SlidingWindowThrottle, 'timer', lambda self: moment)
+            return client.post(self.URL_TOKEN, data=data).status_code
+
+        assert post_at(start) == HTTPStatus.NOT_FOUND
+        assert post_at(start + 10) == HTTPStatus.NOT_FOUND
+        # Через четверть следующего окна прошлые запросы весят 2 * 0.75.
+        assert post_at(start + 75) == HTTPStatus.TOO_MANY_REQUESTS
+        # Отклонённый запрос учтён: лимит освободится с началом окна.
+        assert post_at(start + 119) == HTTPStatus.TOO_MANY_REQUESTS
+        assert post_at(start + 120) == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что ограничение снимается, когда вес запросов '
+            'предыдущего окна опускается ниже лимита.'
+        )
+        assert post_at(start + 121) == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что ограничение учитывает запросы предыдущего '
+            'окна пропорционально оставшейся его доле.'
+        )
+
+    def test_05_stale_counters_are_purged(self, client, settings,
+                                          monkeypatch):
+        from api import throttling
+        from reviews.models import ThrottleCounter
+        settings.THROTTLE_STORE = 'api.throttling.DatabaseCounterStore'
+        settings.THROTTLE_PURGE_PROBABILITY = 1
+        start = 60 * 1000
+
+        def post_at(moment, username):
+            monkeypatch.setattr(
+                throttling.SlidingWindowThrottle, 'timer', lambda self: moment)
+            client.post(self.URL_TOKEN, data={
+                'username': username, 'confirmation_code': 'wrong',
+            })
+
+        post_at(start, 'old')
+        post_at(start + 61, 'recent')
+        post_at(start + 130, 'new')
+        assert set(ThrottleCounter.objects.values_list('key', flat=True)) == {
+            'auth:127.0.0.1', 'auth_username:recent', 'auth_username:new',
+        }, (
+            'Проверьте, что счётчики ключей, не обращавшихся два окна, '
+            'удаляются.'
+        )
@@ -0,0 +1,126 @@
+from http import HTTPStatus
+
+import pytest
+
+USERNAMES = ('Alexandr', 'alina', 'Aleksandr', 'bob', 'Bob', 'xalina')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30UserSearch:
+
+    USERS_URL = '/api/v1/users/'
+    USER_DETAIL_URL_TEMPLATE = '/api/v1/users/{username}/'
+
+    @pytest.fixture
+    def users(self, django_user_model):
+        return [
+            django_user_model.objects.create(
+                username=username, email=f'{number}@yamdb.fake')
+            for number, username in enumerate(USERNAMES)
+        ]
+
+    def search(self, client, **params):
+        response = client.get(self.USERS_URL, params)
+        assert response.status_code == HTTPStatus.OK
+        return [user['username'] for user in response.json()['results']]
+
+    def test_01_prefix_search(self, admin_client, users):
+        assert self.search(admin_client, search='AL') == [
+            'Aleksandr', 'Alexandr', 'alina'
+        ], (
+            f'Проверьте, что `{self.USERS_URL}?search=` находит '
+            'пользователей по началу username без учёта регистра.'
+        )
+        assert self.search(admin_client, search='lina') == [], (
+            f'Проверьте, что `{self.USERS_URL}?search=` ищет по началу '
+            'username, а не по подстроке.'
+        )
+
+    def test_02_prefix_search_uses_index(self, users):
+        from reviews.models import User
+        from reviews.search import search_users
+        plan = search_users(User.objects.all(), 'al').explain()
+        assert 'user_username_lower_idx' in plan, (
+            'Проверьте, что поиск по началу username выполняется '
+            'по индексу LOWER(username).'
+        )
+
+    def test_03_case_insensitive_lookup(self, admin_client, users):
+        response = admin_client.get(
+            self.USER_DETAIL_URL_TEMPLATE.format(username='ALINA'))
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == 'alina', (
+            'Проверьте, что пользователь находится по username без учёта '
+            'регистра.'
+        )
+        for username in ('bob', 'Bob'):
+            response = admin_client.get(
+                self.USER_DETAIL_URL_TEMPLATE.format(username=username))
+            assert response.json()['username'] == username, (
+                'Проверьте, что при именах, различающихся только регистром, '
+                'выбирается точное совпадение.'
+            )
+
+    def test_04_similar_search(self, admin_client, users):
+        found = self.search(admin_client, similar='alexander')
+        assert found[:2] == ['Alexandr', 'Aleksandr'], (
+            f'Проверьте, что `{self.USERS_URL}?similar=` находит похожие '
+            'имена, ближайшие — первыми.'
+        )
+        assert 'bob' not in found
+        admin_client.patch(
+            self.USER_DETAIL_URL_TEMPLATE.format(username='bob'),
+            data={'username': 'alexandra'}
+        )
+        assert 'alexandra' in self.search(
+            admin_client, similar='alexander'
+        ), (
+            'Проверьте, что переименованный пользователь переиндексируется.'
+        )
+
+    def test_05_similar_rank_in_one_pass(self, users):
+        from django.db import connection
+
+        from reviews.models import User
+        from reviews.search import find_similar_users
+        if connection.vendor != 'sqlite':
+            pytest.skip('Форма запроса проверяется для индекса FTS5.')
+        sql = str(find_similar_users(User.objects.all(), 'alexander').query)
+        assert (
+            sql.count('MATCH') == 1 and 'bm25' not in sql
+            and 'JOIN "reviews_user_trigram"' in sql
+        ), (
+            'Проверьте, что триграммный индекс присоединяется один раз, '
+            'а ранг берётся из того же прохода MATCH.'
+        )
+
+    def test_06_old_sqlite_without_trigrams(self, admin_client, users,
+                                            monkeypatch):
+        from django.db import connection
+
+        from reviews.search import get_user_search
+        if connection.vendor != 'sqlite':
+            pytest.skip('Проверяется запасной путь SQLite.')
+        monkeypatch.setattr(
+            connection.Database, 'sqlite_version_info', (3, 31, 1))
+        try:
+            get_user_search().rebuild()
+            assert 'reviews_user_trigram' not in (
+                connection.introspection.table_names()
+            ), (
+                'Проверьте, что таблица с токенизатором trigram не создаётся '
+                'в SQLite старее 3.34.'
+            )
+            admin_client.patch(
+                self.USER_DETAIL_URL_TEMPLATE.format(username='bob'),
+                data={'username': 'bobby'}
+            )
+            assert self.search(admin_client, similar='lin') == [
+                'alina', 'xalina'
+            ], (
+                'Проверьте, что без токенизатора trigram нечёткий поиск '
+                'сводится к поиску подстроки.'
+            )
+        finally:
+            monkeypatch.undo()
+            get_user_search().rebuild()
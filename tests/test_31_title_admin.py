@@ -0,0 +1,48 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31TitleAdmin:
+
+    TITLES_URL = '/api/v1/titles/'
+    ADMIN_CHANGE_URL_TEMPLATE = '/admin/reviews/title/{title_id}/change/'
+    INLINE_PREFIX = 'genretitle_set'
+
+    def test_01_edit_genres_in_admin(self, client, user_superuser):
+        from reviews.models import Category, Genre, Title
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(
+            name='Сталкер', year=1979, category=category)
+        url = self.ADMIN_CHANGE_URL_TEMPLATE.format(title_id=title.pk)
+        admin_site = Client()
+        admin_site.force_login(user_superuser)
+        page = admin_site.get(url).content.decode()
+        assert f'{self.INLINE_PREFIX}-TOTAL_FORMS' in page, (
+            'Проверьте, что на странице произведения в админке можно '
+            'редактировать жанры.'
+        )
+        assert client.get(
+            self.TITLES_URL, {'genre': 'drama'}
+        ).json()['results'] == []
+
+        response = admin_site.post(url, {
+            'name': title.name,
+            'year': title.year,
+            'description': '',
+            'category': category.pk,
+            f'{self.INLINE_PREFIX}-TOTAL_FORMS': 1,
+            f'{self.INLINE_PREFIX}-INITIAL_FORMS': 0,
+            f'{self.INLINE_PREFIX}-0-genre': genre.pk,
+            f'{self.INLINE_PREFIX}-0-title': title.pk,
+        })
+        assert response.status_code == HTTPStatus.FOUND
+        assert list(title.genre.all()) == [genre]
+        found = client.get(self.TITLES_URL, {'genre': 'drama'}).json()
+        assert [item['name'] for item in found['results']] == [title.name], (
+            'Проверьте, что жанры, изменённые в админке, сразу видны в '
+            'фильтре произведений по жанру.'
+        )